@@ -1,14 +1,11 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-import json
 import os
-import numpy as np
 import ssl
-from math import radians, cos, sin, asin, sqrt
-from streamlit_gsheets import GSheetsConnection
+import uuid
 import streamlit.components.v1 as components
+from auth import CredentialStore, normalize_username
+from telemetry import Telemetry
+from warmup import Preloader, import_modules, load_data_store, warm_figure_cache
 
 # --- 0. INITIAL CONFIG ---
 st.set_page_config(page_title="Louisiana Opportunity Zones 2.0 Portal", layout="wide")
@@ -16,12 +13,38 @@ st.set_page_config(page_title="Louisiana Opportunity Zones 2.0 Portal", layout="
 # Initialize session state keys
 if "session_recs" not in st.session_state:
     st.session_state["session_recs"] = []
+if "saved_by_parish" not in st.session_state:
+    st.session_state["saved_by_parish"] = None
 if "active_tract" not in st.session_state:
     st.session_state["active_tract"] = None 
 if "password_correct" not in st.session_state:
     st.session_state["password_correct"] = False
 if "username" not in st.session_state:
     st.session_state["username"] = ""
+if "session_id" not in st.session_state:
+    st.session_state["session_id"] = uuid.uuid4().hex[:12]
+
+# OZ_TELEMETRY_LOG appends one JSON line per rerun; OZ_ADMIN_USERS (comma-separated) may view the performance panel.
+@st.cache_resource
+def get_telemetry():
+    return Telemetry(log_path=os.environ.get("OZ_TELEMETRY_LOG"))
+
+telemetry = get_telemetry()
+trace = telemetry.start_rerun(st.session_state["session_id"], st.session_state["username"] or None)
+
+# --- 0b. WARM-UP ---
+# pandas, plotly, the Sheets connector and the data modules are imported only after login. The first
+# script run of each server process (the login page) starts importing them and loading the data in the
+# background, so the first signed-in rerun renders from warm data.
+DEFAULT_VIEW = ("All Louisiana", "All in Region")
+
+@st.cache_resource
+def get_preloader():
+    preloader = Preloader().add("imports", import_modules).add("data_store", load_data_store)
+    preloader.add("figure_cache", lambda: warm_figure_cache(preloader.result("data_store").get(), DEFAULT_VIEW))
+    return preloader.start()
+
+preloader = get_preloader()
 
 try:
     ssl._create_default_https_context = ssl._create_unverified_context
@@ -29,59 +52,65 @@ except:
     pass
 
 # --- HELPERS ---
+# Tract metrics arrive already numeric from the typed tract table; missing values display as 0.
 def safe_float(val):
-    try:
-        if pd.isna(val) or val == '' or val == 'N/A': return 0.0
-        s = str(val).replace('$', '').replace(',', '').replace('%', '').strip()
-        return float(s)
-    except: return 0.0
+    return 0.0 if pd.isna(val) else float(val)
 
 def safe_int(val):
     return int(safe_float(val))
 
+def gsheets_connection():
+    from streamlit_gsheets import GSheetsConnection
+    return st.connection("gsheets", type=GSheetsConnection)
+
 # --- 1. PERSISTENCE ENGINE ---
+@st.cache_resource
+def get_rec_writer():
+    from persistence import GSheetsBackend, SQLiteBackend, RecommendationCache, WriteBehindQueue
+    # OZ_REC_DB points at a local SQLite file for development; production appends to the shared sheet.
+    if os.environ.get("OZ_REC_DB"): backend = SQLiteBackend(os.environ["OZ_REC_DB"])
+    else: backend = GSheetsBackend(gsheets_connection)
+    writer = WriteBehindQueue(RecommendationCache(backend))
+    telemetry.register("rec_backend.round_trips", lambda: backend.round_trips)
+    telemetry.register("rec_cache.refreshes", lambda: writer.backend.refreshes)
+    telemetry.register("rec_writer.flushed", lambda: writer.flushed)
+    telemetry.register("rec_writer.pending", lambda: len(writer.pending()))
+    return writer
+
 def load_user_recs(username):
+    writer = get_rec_writer()
     try:
-        conn = st.connection("gsheets", type=GSheetsConnection)
-        recs_df = conn.read(worksheet="Recommendations", ttl=0) 
-        if recs_df.empty:
-            return []
-        user_recs = recs_df[recs_df['username'] == username].to_dict('records')
-        return user_recs
+        with telemetry.span("load_user_recs"): return writer.read_user(username)
     except Exception as e:
-        return []
+        return writer.pending(username)
 
 def save_rec_to_cloud(rec_entry):
-    try:
-        conn = st.connection("gsheets", type=GSheetsConnection)
-        existing_df = conn.read(worksheet="Recommendations", ttl=0)
-        rec_entry['username'] = st.session_state["username"]
-        new_row_df = pd.DataFrame([rec_entry])
-        if not existing_df.empty:
-            updated_df = pd.concat([existing_df, new_row_df], ignore_index=True)
-        else:
-            updated_df = new_row_df
-        conn.update(worksheet="Recommendations", data=updated_df)
-    except Exception as e:
-        st.error(f"Cloud Save Failed: {e}")
+    writer = get_rec_writer()
+    rec_entry['username'] = st.session_state["username"]
+    with telemetry.span("save_rec"): writer.put(rec_entry)
+    if writer.last_error is not None:
+        st.error(f"Cloud Save Failed: {writer.last_error} (queued, retrying)")
 
 # --- 2. AUTHENTICATION ---
+@st.cache_resource
+def get_credential_store():
+    # Read the sheet through the raw client so the background refresh needs no script context;
+    # ttl=0 makes every refresh hit the sheet and expires the connector's cached copy at once.
+    conn = gsheets_connection()
+    return CredentialStore(lambda: conn.client.read(worksheet="Users", ttl=0)).start()
+
 def check_password():
     def password_entered():
         try:
-            conn = st.connection("gsheets", type=GSheetsConnection)
-            users_df = conn.read(worksheet="Users", ttl="5m")
-            users_df.columns = users_df.columns.str.strip().str.lower()
             u = st.session_state["username_input"].strip()
             p = str(st.session_state["password_input"]).strip()
-            
-            if u in users_df['username'].astype(str).values:
-                user_row = users_df[users_df['username'].astype(str) == u]
-                if str(user_row['password'].values[0]).strip() == p:
-                    st.session_state["password_correct"] = True
-                    st.session_state["username"] = u
-                    st.session_state["session_recs"] = load_user_recs(u)
-                    return
+            with telemetry.span("login_verify"): username = get_credential_store().verify(u, p)
+            if username is not None:
+                st.session_state["password_correct"] = True
+                st.session_state["username"] = username
+                st.session_state["session_recs"] = load_user_recs(username)
+                st.session_state["saved_by_parish"] = None
+                return
             st.session_state["password_correct"] = False
             st.error("Invalid username or password")
         except Exception as e:
@@ -117,10 +146,18 @@ def check_password():
                 st.text_input("Password", type="password", key="password_input", placeholder="••••••••")
                 st.button("Sign In", on_click=password_entered, use_container_width=True)
             st.markdown("<p style='text-align:center; color:#475569; font-size:0.8rem; margin-top:20px;'>Louisiana Opportunity Zones 2.0 | Admin Access Only</p>", unsafe_allow_html=True)
+        # Load and hash the Users sheet while the form is filled in; a failure surfaces on Sign In.
+        try: get_credential_store()
+        except Exception: pass
         return False
     return True
 
 if check_password():
+    import pandas as pd
+    from data_store import DataStore
+    from map_figure import figure_cache_for, spans_states
+    from scoring import DEFAULT_WEIGHTS, RADIUS_OPTIONS_MI
+
     # --- 3. GLOBAL STYLING & FROZEN NAV ---
     st.markdown("""
         <style>
@@ -162,127 +199,39 @@ if check_password():
         """, unsafe_allow_html=True)
 
     # --- 4. DATA ENGINE ---
-    def haversine(lon1, lat1, lon2, lat2):
-        lon1, lat1, lon2, lat2 = map(radians, [lon1, lat1, lon2, lat2])
-        dlon, dlat = lon2 - lon1, lat2 - lat1
-        a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
-        return 3956 * 2 * asin(sqrt(a))
-
-    @st.cache_data(ttl=3600)
-    def load_assets():
-        gj = None
-        if os.path.exists("tl_2025_22_tract.json"):
-            with open("tl_2025_22_tract.json", "r") as f: gj = json.load(f)
-        
-        def read_csv_with_fallback(path):
-            for enc in ['utf-8', 'latin1', 'cp1252']:
-                try: return pd.read_csv(path, encoding=enc)
-                except: continue
-            return pd.read_csv(path)
-
-        master = read_csv_with_fallback("Opportunity Zones 2.0 - Master Data File.csv")
-        master['geoid_str'] = master['11-digit FIP'].astype(str).str.split('.').str[0].str.zfill(11)
-        
-        master['Eligibility_Status'] = master['Opportunity Zones Insiders Eligibilty'].apply(
-            lambda x: 'Eligible' if str(x).strip().lower() in ['eligible', 'yes', '1', 'true'] else 'Ineligible'
-        )
-
-        def get_nmtc_status(row):
-            is_deep = str(row.get('Deep Distress', '')).strip().upper()
-            is_eligible = str(row.get('NMTC Eligible', '')).strip().upper()
-            if is_deep in ['YES', 'TRUE', '1']: return "Deep Distress"
-            elif is_eligible in ['YES', 'TRUE', '1']: return "Eligible"
-            return "Ineligible"
-
-        master['NMTC_Calculated'] = master.apply(get_nmtc_status, axis=1)
-        anchors = read_csv_with_fallback("la_anchors.csv")
-        anchors['Type'] = anchors['Type'].fillna('Other')
-        centers = {}
-        if gj:
-            for feature in gj['features']:
-                geoid = feature['properties'].get('GEOID') or feature['properties'].get('GEOID20')
-                try:
-                    geom = feature['geometry']
-                    if geom['type'] == 'Polygon': pts = np.array(geom['coordinates'][0])
-                    elif geom['type'] == 'MultiPolygon': pts = np.array(geom['coordinates'][0][0])
-                    centers[geoid] = [np.mean(pts[:, 0]), np.mean(pts[:, 1])]
-                except: continue
-        return gj, master, anchors, centers
-
-    gj, master_df, anchors_df, tract_centers = load_assets()
-
-    def get_zoom_center(geoids):
-        if not geoids or not gj: return {"lat": 30.9, "lon": -91.8}, 6.0
-        lats, lons = [], []
-        id_key = "GEOID" if "GEOID" in str(gj['features'][0]['properties']) else "GEOID20"
-        for feature in gj['features']:
-            gid = feature['properties'].get(id_key)
-            if gid in geoids:
-                geom = feature['geometry']
-                if geom['type'] == 'Polygon':
-                    coords = np.array(geom['coordinates'][0])
-                    lons.extend(coords[:, 0]); lats.extend(coords[:, 1])
-                elif geom['type'] == 'MultiPolygon':
-                    for poly in geom['coordinates']:
-                        coords = np.array(poly[0])
-                        lons.extend(coords[:, 0]); lats.extend(coords[:, 1])
-        if not lats: return {"lat": 30.9, "lon": -91.8}, 6.0
-        min_lat, max_lat = min(lats), max(lats)
-        min_lon, max_lon = min(lons), max(lons)
-        center = {"lat": (min_lat + max_lat) / 2, "lon": (min_lon + max_lon) / 2}
-        lat_diff = max_lat - min_lat
-        lon_diff = max_lon - min_lon
-        max_diff = max(lat_diff, lon_diff)
-        if max_diff == 0: zoom = 12.5
-        elif max_diff < 0.05: zoom = 12.0
-        elif max_diff < 0.1: zoom = 11.0
-        elif max_diff < 0.3: zoom = 10.0
-        elif max_diff < 0.8: zoom = 8.5
-        elif max_diff < 1.5: zoom = 7.5
-        else: zoom = 6.2
-        return center, zoom
-
-    def render_map_go(df):
-        map_df = df.copy().reset_index(drop=True)
-        selected_geoids = [str(rec['Tract']) for rec in st.session_state["session_recs"]]
-        def get_color_cat(row):
-            if str(row['geoid_str']) in selected_geoids: return 2
-            return 1 if row['Eligibility_Status'] == 'Eligible' else 0
-        map_df['Color_Category'] = map_df.apply(get_color_cat, axis=1)
-        if st.session_state.get("active_tract") and st.session_state["active_tract"] in map_df['geoid_str'].values:
-            focus_geoids = {st.session_state["active_tract"]}
-        else:
-            focus_geoids = set(map_df['geoid_str'].tolist())
-        center, zoom = get_zoom_center(focus_geoids)
-        sel_idx = map_df.index[map_df['geoid_str'] == st.session_state["active_tract"]].tolist() if st.session_state["active_tract"] else []
-        revision_key = "_".join(sorted(list(focus_geoids))) if len(focus_geoids) < 5 else str(hash(tuple(sorted(list(focus_geoids)))))
-        fig = go.Figure()
-        fig.add_trace(go.Choroplethmapbox(
-            geojson=gj, locations=map_df['geoid_str'], z=map_df['Color_Category'],
-            featureidkey="properties.GEOID" if "GEOID" in str(gj) else "properties.GEOID20",
-            colorscale=[[0, '#e2e8f0'], [0.5, '#4ade80'], [1, '#f97316']], zmin=0, zmax=2,
-            showscale=False, marker=dict(opacity=0.6, line=dict(width=1.2, color='black')),
-            selectedpoints=sel_idx, hoverinfo="location", name="Census Tracts"
-        ))
-        anchor_types = sorted(anchors_df['Type'].unique())
-        color_palette = px.colors.qualitative.Bold 
-        for i, a_type in enumerate(anchor_types):
-            type_data = anchors_df[anchors_df['Type'] == a_type]
-            marker_color = "#f97316" if a_type == "Project Announcements" else color_palette[i % len(color_palette)]
-            marker_symbol = "star" if a_type == "Project Announcements" else "circle"
-            marker_size = 15 if a_type == "Project Announcements" else 11
-            fig.add_trace(go.Scattermapbox(
-                lat=type_data['Lat'], lon=type_data['Lon'], mode='markers',
-                marker=go.scattermapbox.Marker(size=marker_size, color=marker_color, symbol=marker_symbol),
-                text=type_data['Name'], hoverinfo='text', name=f"{a_type}", visible="legendonly" 
-            ))
-        fig.update_layout(
-            mapbox=dict(style="carto-positron", zoom=zoom, center=center),
-            margin={"r":0,"t":0,"l":0,"b":0}, paper_bgcolor='rgba(0,0,0,0)', height=700, 
-            clickmode='event+select', uirevision=revision_key,
-            legend=dict(title=dict(text="<b>Toggle Anchor Assets</b>", font=dict(size=12)), yanchor="top", y=0.98, xanchor="left", x=0.02, bgcolor="rgba(255, 255, 255, 0.9)", font=dict(size=11, color="#1e293b"), bordercolor="#cbd5e1", borderwidth=1)
-        )
-        return fig
+    @st.cache_resource
+    def get_data_store():
+        try: store = preloader.result("data_store")
+        except Exception: store = DataStore()
+        telemetry.register("data_store.loads", lambda: store.loads)
+        return store
+
+    trace.lap("page_chrome")
+    with telemetry.span("load_assets"): assets = get_data_store().get()
+    # Each session works on its own copy of the tract table, so nothing a rerun does can reach the shared one
+    if st.session_state.get("master_loaded_at") != assets.loaded_at:
+        st.session_state["master_df"], st.session_state["master_loaded_at"] = assets.master.copy(), assets.loaded_at
+    master_df, anchors_df = st.session_state["master_df"], assets.anchors
+    anchor_index, geometry_index, geometry_server = assets.anchor_index, assets.geometry_index, assets.geometry_server
+    tract_centers = assets.tract_centers
+    hierarchy = assets.hierarchy
+    if st.session_state["saved_by_parish"] is None:
+        st.session_state["saved_by_parish"] = hierarchy.saved_by_parish(st.session_state["session_recs"])
+    saved_by_parish = st.session_state["saved_by_parish"]
+
+    @st.cache_resource(max_entries=1)
+    def get_figure_cache(signature, _assets):
+        try: cache = preloader.result("figure_cache")
+        except Exception: cache = None
+        if cache is None or cache.geometry_server is not _assets.geometry_server: cache = figure_cache_for(_assets.geometry_server, _assets.anchors)
+        telemetry.register("figure_cache.hits", lambda: cache.hits)
+        telemetry.register("figure_cache.misses", lambda: cache.misses)
+        geometry_server = _assets.geometry_server
+        if hasattr(geometry_server, "loads"): telemetry.register("geometry.shard_loads", lambda: geometry_server.loads)
+        return cache
+
+    figure_cache = get_figure_cache(assets.signature, assets)
+    trace.lap("data_engine")
 
     # --- SECTION 1: OVERVIEW ---
     st.markdown("<div id='section-1'></div>", unsafe_allow_html=True)
@@ -373,39 +322,73 @@ if check_password():
             <a href='https://www.americafirstpolicy.com/issues/from-policy-to-practice-opportunity-zones-2.0-reforms-and-a-state-blueprint-for-impact' target='_blank'>State Blueprint for Impact ↗</a>
         </div>""", unsafe_allow_html=True)
 
+    trace.lap("static_sections")
+
     # --- SECTION 5: MAPPING SECTION ---
     st.markdown("<div id='section-5'></div>", unsafe_allow_html=True)
     st.markdown("<div class='content-section'><div class='section-num'>SECTION 5</div><div class='section-title'>Strategic Opportunity Zone Mapping & Recommendation</div></div>", unsafe_allow_html=True)
     
+    def apply_search_match():
+        # Runs before the filters are drawn, so it may set their values
+        match = st.session_state.get("search_results", {}).get(st.session_state["search_match"])
+        if match is None: return
+        st.session_state["filter_region"] = match.region or "All Louisiana"
+        st.session_state["filter_parish"] = match.parishes[0]
+        st.session_state["active_tract"] = match.geoid
+        n_tracts = len(assets.search.candidate_tracts(match, hierarchy))
+        st.session_state["search_note"] = None if match.geoid else f"{match.label}: {n_tracts} candidate tracts"
+        st.session_state["search_match"] = "Select a match..."
+
     f_col1, f_col2, f_col3 = st.columns(3)
-    with f_col1: selected_region = st.selectbox("Region", ["All Louisiana"] + sorted(master_df['Region'].dropna().unique().tolist()))
-    filtered_df = master_df.copy()
-    if selected_region != "All Louisiana": filtered_df = filtered_df[filtered_df['Region'] == selected_region]
+    with f_col1: selected_region = st.selectbox("Region", ["All Louisiana", *hierarchy.regions], key="filter_region")
+    region_key = None if selected_region == "All Louisiana" else selected_region
     
-    with f_col2: selected_parish = st.selectbox("Parish", ["All in Region"] + sorted(filtered_df['Parish'].dropna().unique().tolist()))
-    if selected_parish != "All in Region": filtered_df = filtered_df[filtered_df['Parish'] == selected_parish]
+    parish_options = ["All in Region"] + hierarchy.parishes(region_key)
+    if st.session_state.get("filter_parish") not in parish_options: st.session_state["filter_parish"] = "All in Region"
+    with f_col2: selected_parish = st.selectbox("Parish", parish_options, key="filter_parish")
+    parish_key = None if selected_parish == "All in Region" else selected_parish
+    filtered_df = hierarchy.slice(master_df, region_key, parish_key)
     
     with f_col3:
-        tract_list = ["Search Tract GEOID..."] + sorted([str(x) for x in filtered_df['geoid_str'].tolist()])
-        selected_search = st.selectbox("Find Census Tract", tract_list)
-        if selected_search != "Search Tract GEOID...":
-            if st.session_state["active_tract"] != selected_search:
-                st.session_state["active_tract"] = selected_search
-                st.rerun()
+        search_query = st.text_input("Find City, Parish or Tract", key="search_query", placeholder="Type a city, parish or GEOID...")
+        matches = assets.search.complete(search_query, limit=12) if search_query else []
+        st.session_state["search_results"] = {m.label: m for m in matches}
+        if matches: st.selectbox("Matches", ["Select a match..."] + list(st.session_state["search_results"]), key="search_match", on_change=apply_search_match)
+        elif search_query: st.caption("No city, parish or tract matches that search.")
+        if st.session_state.get("search_note"): st.caption(st.session_state["search_note"])
 
     # --- PARISH SNAPSHOT / QUOTA FEATURE ---
     if selected_parish != "All in Region":
-        parish_data = master_df[master_df['Parish'] == selected_parish]
-        total_parish_tracts = len(parish_data)
-        eligible_oz_tracts = len(parish_data[parish_data['Eligibility_Status'] == 'Eligible'])
-        allowed_selections = round(eligible_oz_tracts * 0.25)
+        total_parish_tracts, eligible_oz_tracts, allowed_selections = hierarchy.quotas[selected_parish]
         st.markdown(f"<p style='color:#4ade80; font-weight:900; font-size:0.75rem; letter-spacing:0.15em; margin-top:20px; margin-bottom:10px;'>{selected_parish.upper()} PARISH ALLOCATION SNAPSHOT</p>", unsafe_allow_html=True)
-        q_col1, q_col2, q_col3 = st.columns(3)
+        q_col1, q_col2, q_col3, q_col4 = st.columns(4)
         q_col1.markdown(f"<div class='metric-card'><div class='metric-value'>{total_parish_tracts}</div><div class='metric-label'>Total Tracts</div></div>", unsafe_allow_html=True)
         q_col2.markdown(f"<div class='metric-card'><div class='metric-value'>{eligible_oz_tracts}</div><div class='metric-label'>Eligible OZ Tracts</div></div>", unsafe_allow_html=True)
         q_col3.markdown(f"<div class='metric-card' style='border-color: #f97316;'><div class='metric-value' style='color:#f97316;'>{allowed_selections}</div><div class='metric-label'>Max (25% Limit)</div></div>", unsafe_allow_html=True)
-
-    combined_map = st.plotly_chart(render_map_go(filtered_df), use_container_width=True, on_select="rerun", key="combined_map", config={'scrollZoom': True})
+        q_col4.markdown(f"<div class='metric-card'><div class='metric-value'>{len(saved_by_parish.get(selected_parish, ()))}</div><div class='metric-label'>Your Selections</div></div>", unsafe_allow_html=True)
+
+    trace.lap("filters")
+
+    # --- BATCH TRACT RANKING ---
+    if st.toggle("Rank eligible tracts in this view", key="show_ranking"):
+        w_cols = st.columns(6)
+        weights = {name: w_cols[i].slider(label, 0.0, 2.0, DEFAULT_WEIGHTS[name], 0.25, key=f"w_{name}") for i, (name, label) in enumerate([
+            ("poverty", "Poverty"), ("mfi", "Low MFI"), ("unemployment", "Unemployment"), ("broadband", "Low Broadband"), ("deep_distress", "Deep Distress"), ("anchors", "Anchor Proximity")])}
+        r_col1, r_col2 = st.columns(2)
+        radius_mi = r_col1.select_slider("Anchor Radius (miles)", list(RADIUS_OPTIONS_MI), value=5, key="rank_radius")
+        top_k = r_col2.number_input("Top K", 1, 500, 25, key="rank_top_k")
+        with telemetry.span("rank"): ranking = assets.scoring.rank(weights, region_key, parish_key, top_k=int(top_k), radius_mi=radius_mi, saved_by_parish=saved_by_parish)
+        st.dataframe(ranking, use_container_width=True, hide_index=True)
+
+    trace.lap("ranking")
+
+    selected_geoids = {str(rec['Tract']) for rec in st.session_state["session_recs"]}
+    if assets.geometry_server.sharded and spans_states(filtered_df):
+        combined_map = None
+        st.info("This view spans several states. Pick a region or parish to draw the map.")
+    else:
+        with figure_cache.figure((selected_region, selected_parish), filtered_df, selected_geoids, st.session_state["active_tract"]) as map_fig:
+            combined_map = st.plotly_chart(map_fig, use_container_width=True, on_select="rerun", key="combined_map", config={'scrollZoom': True})
     
     if combined_map and "selection" in combined_map and combined_map["selection"]["points"]:
         new_id = str(combined_map["selection"]["points"][0]["location"])
@@ -413,46 +396,56 @@ if check_password():
             st.session_state["active_tract"] = new_id
             st.rerun()
 
+    trace.lap("map")
+
     if st.session_state["active_tract"]:
         curr = st.session_state["active_tract"]
-        row = master_df[master_df["geoid_str"] == str(curr)].iloc[0]
-        st.markdown(f"<div style='display: flex; justify-content: space-between; align-items: center; background: #111827; padding: 20px; border-radius: 8px; border: 1px solid #1e293b; margin-bottom: 20px;'><div><div style='font-size: 1.8rem; font-weight: 900; color: #4ade80;'>{str(row['Parish']).upper()}</div><div style='color: #94a3b8; font-size: 0.85rem;'>GEOID: {curr}</div></div><div style='text-align: right;'><div style='font-size: 1.6rem; font-weight: 900; color: #f8fafc;'>{safe_int(row.get('Estimate!!Total!!Population for whom poverty status is determined', 0)):,}</div><div style='color: #94a3b8; font-size: 0.7rem; text-transform: uppercase;'>Population</div></div></div>", unsafe_allow_html=True)
+        row = master_df.loc[str(curr)]
+        st.markdown(f"<div style='display: flex; justify-content: space-between; align-items: center; background: #111827; padding: 20px; border-radius: 8px; border: 1px solid #1e293b; margin-bottom: 20px;'><div><div style='font-size: 1.8rem; font-weight: 900; color: #4ade80;'>{str(row['Parish']).upper()}</div><div style='color: #94a3b8; font-size: 0.85rem;'>GEOID: {curr}</div></div><div style='text-align: right;'><div style='font-size: 1.6rem; font-weight: 900; color: #f8fafc;'>{safe_int(row['population']):,}</div><div style='color: #94a3b8; font-size: 0.7rem; text-transform: uppercase;'>Population</div></div></div>", unsafe_allow_html=True)
         d_col1, d_col2 = st.columns([0.6, 0.4], gap="large")
         with d_col1:
             st.markdown("<p style='color:#4ade80; font-weight:900; font-size:0.75rem; letter-spacing:0.15em; margin-bottom:15px;'>TRACT DEMOGRAPHICS</p>", unsafe_allow_html=True)
             m1 = st.columns(3)
-            m1[0].markdown(f"<div class='metric-card'><div class='metric-value'>{row.get('Metro Status (Metropolitan/Rural)', 'N/A')}</div><div class='metric-label'>Metro Status</div></div>", unsafe_allow_html=True)
+            m1[0].markdown(f"<div class='metric-card'><div class='metric-value'>{row['metro_status'] if pd.notna(row['metro_status']) else 'N/A'}</div><div class='metric-label'>Metro Status</div></div>", unsafe_allow_html=True)
             is_nmtc = "YES" if row['NMTC_Calculated'] in ["Eligible", "Deep Distress"] else "NO"
             m1[1].markdown(f"<div class='metric-card'><div class='metric-value'>{is_nmtc}</div><div class='metric-label'>NMTC Eligible</div></div>", unsafe_allow_html=True)
             is_deep = "YES" if row['NMTC_Calculated'] == "Deep Distress" else "NO"
             m1[2].markdown(f"<div class='metric-card'><div class='metric-value'>{is_deep}</div><div class='metric-label'>Deep Distress</div></div>", unsafe_allow_html=True)
             
             m2 = st.columns(3)
-            m2[0].markdown(f"<div class='metric-card'><div class='metric-value'>{safe_float(row.get('Estimate!!Percent below poverty level!!Population for whom poverty status is determined', 0)):.1f}%</div><div class='metric-label'>Poverty</div></div>", unsafe_allow_html=True)
-            m2[1].markdown(f"<div class='metric-card'><div class='metric-value'>${safe_float(row.get('Estimate!!Median family income in the past 12 months (in 2024 inflation-adjusted dollars)', 0)):,.0f}</div><div class='metric-label'>MFI</div></div>", unsafe_allow_html=True)
-            m2[2].markdown(f"<div class='metric-card'><div class='metric-value'>{safe_float(row.get('Unemployment Rate (%)', 0)):.1f}%</div><div class='metric-label'>Unemployment</div></div>", unsafe_allow_html=True)
+            m2[0].markdown(f"<div class='metric-card'><div class='metric-value'>{safe_float(row['poverty_pct']):.1f}%</div><div class='metric-label'>Poverty</div></div>", unsafe_allow_html=True)
+            m2[1].markdown(f"<div class='metric-card'><div class='metric-value'>${safe_float(row['mfi']):,.0f}</div><div class='metric-label'>MFI</div></div>", unsafe_allow_html=True)
+            m2[2].markdown(f"<div class='metric-card'><div class='metric-value'>{safe_float(row['unemployment_pct']):.1f}%</div><div class='metric-label'>Unemployment</div></div>", unsafe_allow_html=True)
             
             m3 = st.columns(3)
-            m3[0].markdown(f"<div class='metric-card'><div class='metric-value'>{safe_int(row.get('Population 18 to 24', 0)):,}</div><div class='metric-label'>Pop 18-24</div></div>", unsafe_allow_html=True)
-            m3[1].markdown(f"<div class='metric-card'><div class='metric-value'>{safe_int(row.get('Population 65 years and over', 0)):,}</div><div class='metric-label'>Pop 65+</div></div>", unsafe_allow_html=True)
-            m3[2].markdown(f"<div class='metric-card'><div class='metric-value'>{safe_float(row.get('Broadband Internet (%)', 0)):.1f}%</div><div class='metric-label'>Broadband</div></div>", unsafe_allow_html=True)
+            m3[0].markdown(f"<div class='metric-card'><div class='metric-value'>{safe_int(row['pop_18_24']):,}</div><div class='metric-label'>Pop 18-24</div></div>", unsafe_allow_html=True)
+            m3[1].markdown(f"<div class='metric-card'><div class='metric-value'>{safe_int(row['pop_65_plus']):,}</div><div class='metric-label'>Pop 65+</div></div>", unsafe_allow_html=True)
+            m3[2].markdown(f"<div class='metric-card'><div class='metric-value'>{safe_float(row['broadband_pct']):.1f}%</div><div class='metric-label'>Broadband</div></div>", unsafe_allow_html=True)
             
             rec_cat = st.selectbox("Recommendation Category", ["Housing Development", "Business Development", "Technology & Research", "Healthcare & Community Services"], key="recommendation_category")
             justification = st.text_area("Strategic Justification", height=120, key="tract_justification")
-            if st.button("Add to Recommendation Report", use_container_width=True, type="primary"):
-                new_entry = {"username": st.session_state["username"], "Tract": curr, "Parish": row['Parish'], "Category": rec_cat, "Justification": justification, "Population": safe_int(row.get('Estimate!!Total!!Population for whom poverty status is determined', 0)), "Poverty": f"{safe_float(row.get('Estimate!!Percent below poverty level!!Population for whom poverty status is determined', 0)):.1f}%", "MFI": f"${safe_float(row.get('Estimate!!Median family income in the past 12 months (in 2024 inflation-adjusted dollars)', 0)):,.0f}", "Broadband": f"{safe_float(row.get('Broadband Internet (%)', 0)):.1f}%"}
-                save_rec_to_cloud(new_entry); st.session_state["session_recs"] = load_user_recs(st.session_state["username"]); st.toast(f"Tract {curr} added!"); st.rerun()
-
+            parish_saved = saved_by_parish.get(str(row['Parish']), set())
+            parish_cap = hierarchy.max_selections(row['Parish'])
+            quota_reached = curr not in parish_saved and len(parish_saved) >= parish_cap
+            if quota_reached and parish_cap == 0: st.warning(f"{row['Parish']} Parish has too few eligible tracts for a 25% allocation, so none can be added.")
+            elif quota_reached: st.warning(f"{row['Parish']} Parish has reached its 25% limit of {parish_cap} tract(s).")
+            if st.button("Add to Recommendation Report", use_container_width=True, type="primary", disabled=quota_reached):
+                new_entry = {"username": st.session_state["username"], "Tract": curr, "Parish": row['Parish'], "Category": rec_cat, "Justification": justification, "Population": safe_int(row['population']), "Poverty": f"{safe_float(row['poverty_pct']):.1f}%", "MFI": f"${safe_float(row['mfi']):,.0f}", "Broadband": f"{safe_float(row['broadband_pct']):.1f}%"}
+                save_rec_to_cloud(new_entry); st.session_state["session_recs"].append(new_entry); parish_saved.add(curr); saved_by_parish[str(row['Parish'])] = parish_saved; st.toast(f"Tract {curr} added!"); st.rerun()
+
+        trace.lap("tract_detail")
         with d_col2:
             st.markdown("<p style='color:#4ade80; font-weight:900; font-size:0.75rem; letter-spacing:0.15em; margin-bottom:15px;'>NEARBY ANCHORS & ANNOUNCEMENTS</p>", unsafe_allow_html=True)
-            selected_asset_type = st.selectbox("Anchor Type Filter", ["All Assets"] + sorted(anchors_df['Type'].unique().tolist()), key="anch_filt_v2")
+            inside_counts = assets.tract_anchors.counts_by_type(curr)
+            inside_text = ", ".join(f"{t} {n}" for t, n in inside_counts.items())
+            st.markdown(f"<p style='color:#94a3b8; font-size:0.8rem; margin-bottom:10px;'>Inside this tract: <b style='color:#f8fafc;'>{sum(inside_counts.values())}</b>{f' ({inside_text})' if inside_text else ''}</p>", unsafe_allow_html=True)
+            selected_asset_type = st.selectbox("Anchor Type Filter", ["All Assets"] + anchor_index.types, key="anch_filt_v2")
             if curr in tract_centers:
                 lon, lat = tract_centers[curr]
-                working = anchors_df.copy()
-                if selected_asset_type != "All Assets": working = working[working['Type'] == selected_asset_type]
-                working['dist'] = working.apply(lambda r: haversine(lon, lat, r['Lon'], r['Lat']), axis=1)
+                a_type = None if selected_asset_type == "All Assets" else selected_asset_type
+                with telemetry.span("nearby_query"): nearby = anchor_index.frame(*anchor_index.nearest(lat, lon, k=15, a_type=a_type))
                 list_html = ""
-                for _, a in working.sort_values('dist').head(15).iterrows():
+                for _, a in nearby.iterrows():
                     is_announcement = (a['Type'] == "Project Announcements"); type_color = "#f97316" if is_announcement else "#4ade80"
                     link_btn = ""
                     if 'Link' in a and pd.notna(a['Link']) and str(a['Link']).strip() != "":
@@ -460,6 +453,7 @@ if check_password():
                         link_btn = f"<a href='{str(a['Link']).strip()}' target='_blank' class='view-site-btn'>{btn_label}</a>"
                     list_html += f"<div class='anchor-card'><div style='color:{type_color}; font-size:0.7rem; font-weight:900; text-transform:uppercase;'>{str(a['Type'])}</div><div style='color:white; font-weight:800; font-size:1.1rem; line-height:1.2;'>{str(a['Name'])}</div><div style='color:#94a3b8; font-size:0.85rem;'>{a['dist']:.1f} miles</div>{link_btn}</div>"
                 components.html(f"<style>body {{ background: transparent; font-family: 'Inter', sans-serif; margin:0; padding:0; }} .anchor-card {{ background:#111827; border:1px solid #1e293b; padding:15px; border-radius:10px; margin-bottom:12px; }} .view-site-btn {{ display: block; background-color: #4ade80; color: #0b0f19; padding: 8px 0; border-radius: 4px; text-decoration: none; font-size: 0.7rem; font-weight: 900; text-align: center; margin-top: 8px; border: 1px solid #4ade80; }} .view-site-btn:hover {{ background-color: #22c55e; }}</style>{list_html}", height=440, scrolling=True)
+        trace.lap("nearby_anchors")
 
     # --- SECTION 6: REPORT ---
     st.markdown("<div id='section-6'></div>", unsafe_allow_html=True)
@@ -477,4 +471,15 @@ if check_password():
         csv_data = report_df.to_csv(index=False).encode('utf-8')
         st.download_button("Download Report (.CSV)", csv_data, f"OZ_Recommendations_{st.session_state['username']}.csv", "text/csv", use_container_width=True)
     else:
-        st.info("No recommendations added yet. Select a tract on the map to begin.")
\ No newline at end of file
+        st.info("No recommendations added yet. Select a tract on the map to begin.")
+    trace.lap("report")
+
+    # --- ADMIN: PERFORMANCE ---
+    admin_users = {normalize_username(u) for u in os.environ.get("OZ_ADMIN_USERS", "").split(",") if u.strip()}
+    if normalize_username(st.session_state["username"]) in admin_users:
+        st.markdown("<div class='content-section'><div class='section-num'>ADMIN</div><div class='section-title'>Rerun Performance</div><div class='narrative-text'>Per-stage timings across all sessions on this server (most recent reruns), slowest p95 first.</div></div>", unsafe_allow_html=True)
+        a_col1, a_col2 = st.columns([0.65, 0.35], gap="large")
+        a_col1.dataframe(telemetry.summary(), use_container_width=True, hide_index=True)
+        a_col2.dataframe(pd.DataFrame(telemetry.counters().items(), columns=["counter", "value"]), use_container_width=True, hide_index=True)
+
+trace.finish()
\ No newline at end of file
@@ -0,0 +1,90 @@
+"""In-memory credential index for the portal login."""
+import hashlib
+import hmac
+import logging
+import os
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+HASH_ITERATIONS = 50_000
+_DUMMY_SALT = os.urandom(16)
+
+
+def normalize_username(username):
+    return str(username).strip().casefold()
+
+
+def hash_password(password, salt, iterations=HASH_ITERATIONS):
+    return hashlib.pbkdf2_hmac("sha256", str(password).strip().encode("utf-8"), salt, iterations)
+
+
+def build_index(users_df):
+    """{normalized username: (username, salt, pbkdf2 hash)} from a Users sheet frame."""
+    users_df = users_df.rename(columns=lambda c: str(c).strip().lower())
+    index = {}
+    users_df = users_df.dropna(subset=['username', 'password'])
+    for username, password in zip(users_df['username'].astype(str), users_df['password'].astype(str)):
+        username = username.strip()
+        if not username: continue
+        salt = os.urandom(16)
+        index[normalize_username(username)] = (username, salt, hash_password(password, salt))
+    return index
+
+
+class CredentialStore:
+    """Salted password hashes keyed by normalized username, refreshed in the background.
+
+    ``loader`` returns the Users sheet as a DataFrame; the frame is dropped as
+    soon as it has been hashed, so plaintext passwords are not kept around.
+    """
+
+    def __init__(self, loader, refresh_interval=300.0):
+        self.loader = loader
+        self.refresh_interval = refresh_interval
+        self.loaded_at = None
+        self.last_error = None
+        self._index = None
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def refresh(self):
+        index = build_index(self.loader())
+        self._index, self.loaded_at = index, time.time()
+        return len(index)
+
+    def start(self):
+        """Start the background thread (idempotent); it loads the index right away if nothing has yet."""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="credential-refresh", daemon=True)
+                self._thread.start()
+        return self
+
+    def _run(self):
+        with self._lock:
+            if self._index is None: self._refresh_logged()
+        while True:
+            time.sleep(self.refresh_interval)
+            self._refresh_logged()
+
+    def _refresh_logged(self):
+        try:
+            self.refresh()
+            self.last_error = None
+        except Exception as e:
+            self.last_error = e
+            log.warning("Users refresh failed, keeping previous index: %s", e)
+
+    def verify(self, username, password):
+        """The stored username if the credentials match, else None."""
+        if self._index is None:
+            with self._lock:
+                if self._index is None: self.refresh()
+        entry = self._index.get(normalize_username(username))
+        if entry is None:
+            hash_password(password, _DUMMY_SALT)  # same cost as a real check, so unknown names don't answer faster
+            return None
+        stored_name, salt, digest = entry
+        return stored_name if hmac.compare_digest(digest, hash_password(password, salt)) else None
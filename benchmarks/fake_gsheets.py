@@ -0,0 +1,80 @@
+"""In-process stand-in for the Google Sheets connection behind ``GSheetsBackend``.
+
+Implements only the calls the backend makes (``read`` on the connection and
+``row_values``/``col_values``/``append_row(s)``/``get_lastUpdateTime`` on
+the gspread worksheet). Every call counts as one round trip and can sleep
+for a fixed ``latency`` to mimic the network.
+"""
+import threading
+import time
+
+import pandas as pd
+
+
+class FakeSpreadsheet:
+    def __init__(self, owner):
+        self._owner = owner
+
+    def get_lastUpdateTime(self):
+        self._owner._round_trip()
+        return self._owner.updated
+
+
+class FakeWorksheet:
+    def __init__(self, latency=0.0, header=None):
+        self.latency = latency
+        self.rows = [list(header)] if header else []
+        self.round_trips = 0
+        self.updated = 0
+        self.spreadsheet = FakeSpreadsheet(self)
+        self._lock = threading.Lock()
+
+    def _round_trip(self):
+        with self._lock: self.round_trips += 1
+        if self.latency: time.sleep(self.latency)
+
+    def row_values(self, i):
+        self._round_trip()
+        return list(self.rows[i - 1]) if len(self.rows) >= i else []
+
+    def col_values(self, i):
+        self._round_trip()
+        return [r[i - 1] for r in self.rows if len(r) >= i]
+
+    def append_row(self, values, value_input_option=None):
+        self.append_rows([values], value_input_option)
+
+    def append_rows(self, values, value_input_option=None):
+        self._round_trip()
+        with self._lock:
+            self.rows.extend(list(v) for v in values)
+            self.updated += 1
+
+    def frame(self):
+        if not self.rows: return pd.DataFrame()
+        return pd.DataFrame(self.rows[1:], columns=self.rows[0])
+
+
+class FakeClient:
+    def __init__(self, worksheets):
+        self._worksheets = worksheets
+
+    def _select_worksheet(self, worksheet=None):
+        return self._worksheets[worksheet]
+
+
+class FakeGSheetsConnection:
+    """``GSheetsConnection`` look-alike over named ``FakeWorksheet``s."""
+
+    def __init__(self, latency=0.0, worksheets=("Recommendations",)):
+        self.worksheets = {name: FakeWorksheet(latency) for name in worksheets}
+        self.client = FakeClient(self.worksheets)
+
+    @property
+    def round_trips(self):
+        return sum(ws.round_trips for ws in self.worksheets.values())
+
+    def read(self, worksheet=None, ttl=None):
+        ws = self.worksheets[worksheet]
+        ws._round_trip()
+        return ws.frame()
@@ -0,0 +1,237 @@
+"""Benchmark the portal's data paths outside a browser session.
+
+Measures a cold ``load_assets()`` in a fresh process (with and without the
+Parquet artifact) and, in-process, the per-rerun paths: map zoom/center,
+the cached map figure (build, patch and JSON serialization), nearby
+anchors, search, ranking and recommendation saves. Saves go through
+``GSheetsBackend`` over an in-process fake sheet. Each stage reports p50/p95
+latency and its tracemalloc peak.
+
+    python -m benchmarks.run                       # Louisiana sources
+    python -m benchmarks.run --dataset national    # ~85k tracts, 100k+ anchors
+    python -m benchmarks.run --dataset national --sharded   # same, served from a shards build
+    python -m benchmarks.run --save-baseline       # record this machine's numbers
+    python -m benchmarks.run --check               # exit 1 on a regression
+
+Timings are only comparable with a baseline recorded on the same machine.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+import shards
+from benchmarks import synthetic
+from benchmarks.fake_gsheets import FakeGSheetsConnection
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+WORK_DIR = os.path.join(REPO_DIR, ".cache", "benchmarks")
+DATASETS = {'louisiana': None, 'national': (synthetic.NATIONAL_TRACTS, synthetic.NATIONAL_ANCHORS)}
+DEFAULT_TOLERANCE = 0.5
+# smallest absolute slowdown that can count as a regression, by metric unit
+MIN_DELTA = {'_s': 0.25, '_ms': 1.0, '_mb': 32.0}
+
+
+def _maxrss_mb():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1 << 20) if sys.platform == "darwin" else rss / 1024
+
+
+_COLD_START = """
+import json, sys, time
+started = time.perf_counter()
+from data_store import load_assets
+from benchmarks.run import _maxrss_mb
+assets = load_assets(sys.argv[1], sys.argv[2])
+print(json.dumps({'seconds': time.perf_counter() - started, 'rss_mb': _maxrss_mb(), 'tracts': len(assets.master), 'anchors': len(assets.anchors)}))
+"""
+
+
+def cold_start(data_dir, cache_dir):
+    """Imports plus ``load_assets`` in a fresh interpreter."""
+    out = subprocess.run([sys.executable, "-c", _COLD_START, data_dir, cache_dir], cwd=REPO_DIR, capture_output=True, text=True)
+    if out.returncode: raise RuntimeError(f"cold start failed:\n{out.stderr}")
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def measure(fn, repeat):
+    fn()  # warm-up
+    samples = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t)
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    ms = np.array(samples) * 1000
+    return {'p50_ms': round(float(np.percentile(ms, 50)), 3), 'p95_ms': round(float(np.percentile(ms, 95)), 3), 'peak_kib': round(peak / 1024, 1)}
+
+
+def run_stages(assets, repeat, sheet_latency=0.0, seed=0):
+    from map_figure import MapFigureCache
+    from persistence import GSheetsBackend, RecommendationCache, WriteBehindQueue
+
+    rng = random.Random(seed)
+    master, hierarchy = assets.master, assets.hierarchy
+    geoids = master['geoid_str'].astype(str).tolist()
+    region = hierarchy.regions[0]
+    parish = hierarchy.parishes(region)[0]
+    views = {'all': (None, None), 'region': (region, None), 'parish': (region, parish)}
+    centers = assets.tract_centers
+    sample_tracts = [g for g in rng.sample(geoids, min(200, len(geoids))) if g in centers]
+    queries = [e.label.split(" (")[0][:3] for e in rng.sample(assets.search.entries, min(200, len(assets.search)))]
+    pick = lambda seq: seq[rng.randrange(len(seq))]
+    stages = {}
+
+    for view, (r, p) in views.items():
+        df = hierarchy.slice(master, r, p)
+        view_geoids = set(df['geoid_str'])
+        stages[f'zoom_center_{view}'] = measure(lambda: assets.geometry_index.zoom_center(view_geoids), repeat)
+        stages[f'map_build_{view}'] = measure(lambda: _render(MapFigureCache(assets.geometry_server, assets.anchors), view, df), max(5, repeat // 2))
+        cache = MapFigureCache(assets.geometry_server, assets.anchors)
+        stages[f'map_patch_{view}'] = measure(lambda: _render(cache, view, df, pick(sample_tracts)), repeat)
+        stages[f'map_serialize_{view}'] = measure(lambda: _render(cache, view, df, serialize=True), max(5, repeat // 2))
+
+    stages['nearby_anchors'] = measure(lambda: assets.anchor_index.frame(*assets.anchor_index.nearest(*centers[pick(sample_tracts)][::-1], k=15)), repeat)
+    stages['anchors_inside'] = measure(lambda: assets.tract_anchors.counts_by_type(pick(sample_tracts)), repeat)
+    stages['search'] = measure(lambda: assets.search.complete(pick(queries), 12), repeat)
+    stages['rank_all'] = measure(lambda: assets.scoring.rank(top_k=25), repeat)
+    stages['rank_parish'] = measure(lambda: assets.scoring.rank(region=region, parish=parish, top_k=25), repeat)
+
+    conn = FakeGSheetsConnection(latency=sheet_latency)
+    writer = WriteBehindQueue(RecommendationCache(GSheetsBackend(lambda: conn)), flush_interval=3600)
+    rec = lambda: {'username': f"user{rng.randrange(50)}", 'Tract': pick(geoids), 'Parish': parish, 'Category': 'Housing Development',
+                   'Justification': 'benchmark', 'Population': 1000, 'Poverty': '20.0%', 'MFI': '$50,000', 'Broadband': '80.0%'}
+    writer.backend.read_user("user0")  # first read loads the (empty) sheet
+    stages['save_rec_put'] = measure(lambda: writer.put(rec()), repeat)
+    before = conn.round_trips
+    stages['save_rec_flush'] = measure(lambda: (writer.put(rec()), writer.flush()), repeat)
+    stages['save_rec_flush']['round_trips'] = round((conn.round_trips - before) / (repeat + 2), 2)
+    stages['load_user_recs'] = measure(lambda: writer.read_user(f"user{rng.randrange(50)}"), repeat)
+    writer.close()
+    return stages
+
+
+def _render(cache, view, df, active_tract=None, serialize=False):
+    with cache.figure((view,), df, set(), active_tract) as fig:
+        return fig.to_json() if serialize else fig
+
+
+def dataset_dir(name, work_dir=WORK_DIR):
+    """Source directory for a dataset, generating the synthetic one on first use."""
+    if DATASETS[name] is None: return REPO_DIR
+    tracts, anchors = DATASETS[name]
+    out = os.path.join(work_dir, f"{name}-{tracts}-{anchors}")
+    if not os.path.exists(os.path.join(out, ".complete")):
+        shutil.rmtree(out, ignore_errors=True)
+        synthetic.generate(out, tracts, anchors)
+        open(os.path.join(out, ".complete"), "w").close()
+    return out
+
+
+def shard_dir(name, work_dir=WORK_DIR):
+    """Shard build of a dataset's sources; rebuilt only when they change."""
+    out = os.path.join(work_dir, f"shards-{name}")
+    shards.build_shards([dataset_dir(name, work_dir)], out)
+    return out
+
+
+def run(name, repeat=20, sheet_latency=0.0, work_dir=WORK_DIR, sharded=False):
+    from data_store import load_assets
+
+    data_dir = shard_dir(name, work_dir) if sharded else dataset_dir(name, work_dir)
+    cache_dir = os.path.join(work_dir, f"artifacts-{name}")
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    cold_build = cold_start(data_dir, cache_dir)
+    cold = cold_start(data_dir, cache_dir)
+    assets = load_assets(data_dir, cache_dir)
+    return {
+        'meta': {'dataset': name, 'sharded': sharded, 'tracts': cold['tracts'], 'anchors': cold['anchors'], 'repeat': repeat, 'sheet_latency_ms': sheet_latency * 1000,
+                 'python': platform.python_version(), 'machine': platform.machine(), 'cpus': os.cpu_count()},
+        'cold_start': {'build_s': round(cold_build['seconds'], 3), 'build_rss_mb': round(cold_build['rss_mb'], 1),
+                       'cached_s': round(cold['seconds'], 3), 'cached_rss_mb': round(cold['rss_mb'], 1)},
+        'stages': run_stages(assets, repeat, sheet_latency),
+        'peak_rss_mb': round(_maxrss_mb(), 1),
+    }
+
+
+def compare(result, baseline, tolerance=DEFAULT_TOLERANCE):
+    """(metric, baseline, current, ratio, regressed) rows, and whether any metric regressed.
+
+    A metric regresses when it is more than ``1 + tolerance`` times its
+    baseline and also slower by at least its unit's ``MIN_DELTA``, so
+    sub-millisecond stages are not flagged for scheduler noise.
+    """
+    rows = []
+    for key in ('build_s', 'cached_s', 'cached_rss_mb'):
+        rows.append((f"cold_start.{key}", baseline['cold_start'].get(key), result['cold_start'][key]))
+    for stage, stats in result['stages'].items():
+        rows.append((f"{stage}.p50_ms", baseline['stages'].get(stage, {}).get('p50_ms'), stats['p50_ms']))
+    rows.append(("peak_rss_mb", baseline.get('peak_rss_mb'), result['peak_rss_mb']))
+    out = []
+    for metric, old, new in rows:
+        ratio = new / old if old else None
+        floor = next(v for unit, v in MIN_DELTA.items() if metric.endswith(unit))
+        out.append((metric, old, new, ratio, ratio is not None and ratio > 1 + tolerance and new - old >= floor))
+    return out, any(row[-1] for row in out)
+
+
+def load_baseline(path=BASELINE_FILE):
+    if not os.path.exists(path): return {}
+    with open(path) as f: return json.load(f)
+
+
+def print_report(result, comparison=None):
+    meta = result['meta']
+    print(f"dataset {meta['dataset']}{' (sharded)' if meta.get('sharded') else ''}: {meta['tracts']} tracts, {meta['anchors']} anchors, {meta['repeat']} reruns per stage")
+    cs = result['cold_start']
+    print(f"cold start: {cs['build_s']:.2f}s building artifacts ({cs['build_rss_mb']:.0f} MB), {cs['cached_s']:.2f}s cached ({cs['cached_rss_mb']:.0f} MB)")
+    print(f"{'stage':<28}{'p50 ms':>10}{'p95 ms':>10}{'peak KiB':>12}")
+    for stage, s in result['stages'].items():
+        print(f"{stage:<28}{s['p50_ms']:>10.2f}{s['p95_ms']:>10.2f}{s['peak_kib']:>12.0f}")
+    print(f"Sheets round trips per flushed save: {result['stages']['save_rec_flush']['round_trips']}")
+    print(f"peak RSS {result['peak_rss_mb']:.0f} MB")
+    if comparison:
+        print(f"\n{'metric':<34}{'baseline':>10}{'current':>10}{'ratio':>8}")
+        for metric, old, new, ratio, regressed in comparison:
+            flag = "  REGRESSION" if regressed else ""
+            print(f"{metric:<34}{'-' if old is None else f'{old:.2f}':>10}{new:>10.2f}{'-' if ratio is None else f'{ratio:.2f}':>8}{flag}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark load_assets and the per-rerun data paths.")
+    parser.add_argument("--dataset", choices=sorted(DATASETS), default="louisiana")
+    parser.add_argument("--sharded", action="store_true", help="load the dataset from a shards build")
+    parser.add_argument("--repeat", type=int, default=20, help="timed runs per stage")
+    parser.add_argument("--sheet-latency-ms", type=float, default=0.0, help="simulated Sheets round-trip latency")
+    parser.add_argument("--work-dir", default=WORK_DIR, help="generated datasets and artifacts")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the dataset's baseline")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="allowed slowdown before a metric counts as a regression")
+    parser.add_argument("--check", action="store_true", help="exit 1 if any metric regressed")
+    parser.add_argument("--out", help="also write the results as JSON")
+    args = parser.parse_args()
+
+    result = run(args.dataset, args.repeat, args.sheet_latency_ms / 1000, args.work_dir, args.sharded)
+    key = f"{args.dataset}-sharded" if args.sharded else args.dataset
+    baselines = load_baseline(args.baseline)
+    comparison, regressed = compare(result, baselines[key], args.tolerance) if key in baselines else (None, False)
+    print_report(result, comparison)
+    if args.out:
+        with open(args.out, "w") as f: json.dump(result, f, indent=2)
+    if args.save_baseline:
+        baselines[key] = result
+        with open(args.baseline, "w") as f: json.dump(baselines, f, indent=2, sort_keys=True)
+    if args.check and regressed: sys.exit(1)
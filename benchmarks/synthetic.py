@@ -0,0 +1,121 @@
+"""Synthetic scale-up of the portal's source files for benchmarking.
+
+The Louisiana sources are tiled ``copies`` times across a lon/lat grid.
+Each copy gets its own state code in the GEOIDs and a suffix on parish,
+region and city names, so every tract, parish and region is unique.
+Anchors are resampled with a small jitter to reach the requested total.
+Run ``python -m benchmarks.synthetic --tracts 85000 --anchors 100000 OUT_DIR``
+from the repository root.
+"""
+import argparse
+import json
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+from data_store import DATA_DIR, GEOJSON_FILE, ANCHORS_FILE
+from tract_table import MASTER_FILE, DEMOGRAPHICS_FILE, TRACT_DATA_FILE, CROSSWALK_FILE, read_csv_with_fallback
+
+GRID_COLUMNS = 10
+LON_STEP, LAT_STEP = 5.5, 4.5
+STATE_CODES = ["22"] + [f"{i:02d}" for i in range(1, 100) if i != 22]  # copy 0 keeps Louisiana's
+MAX_COPIES = len(STATE_CODES)
+GEOID_COLUMNS = {MASTER_FILE: '11-digit FIP', DEMOGRAPHICS_FILE: 'FIPS', TRACT_DATA_FILE: 'GEOID'}
+NATIONAL_TRACTS, NATIONAL_ANCHORS = 85_000, 100_000
+
+
+def copy_offset(c):
+    return (c % GRID_COLUMNS) * LON_STEP, (c // GRID_COLUMNS) * LAT_STEP
+
+
+def copy_suffix(c):
+    return "" if c == 0 else f" S{c:02d}"
+
+
+def copy_geoid(geoid, c):
+    return STATE_CODES[c] + str(geoid)[2:]
+
+
+def _shift(coords, dlon, dlat):
+    if coords and isinstance(coords[0], (int, float)): return [coords[0] + dlon, coords[1] + dlat] + list(coords[2:])
+    return [_shift(c, dlon, dlat) for c in coords]
+
+
+def tile_geojson(gj, copies):
+    features = []
+    for c in range(copies):
+        dlon, dlat = copy_offset(c)
+        for f in gj['features']:
+            props = dict(f['properties'])
+            geoid = str(props.get('GEOID'))
+            for k, v in props.items():
+                if isinstance(v, str) and geoid in v: props[k] = v.replace(geoid, copy_geoid(geoid, c))
+            if 'STATEFP' in props: props['STATEFP'] = STATE_CODES[c]
+            geometry = {'type': f['geometry']['type'], 'coordinates': _shift(f['geometry']['coordinates'], dlon, dlat)}
+            features.append({'type': 'Feature', 'properties': props, 'geometry': geometry})
+    return {'type': 'FeatureCollection', 'features': features}
+
+
+def _normalized_geoids(series):
+    return series.astype(str).str.split('.').str[0].str.zfill(11)
+
+
+def tile_table(df, copies, geoid_col=None, name_cols=()):
+    parts = []
+    for c in range(copies):
+        part = df.copy()
+        if geoid_col: part[geoid_col] = [copy_geoid(g, c) for g in _normalized_geoids(df[geoid_col])]
+        for col in name_cols:
+            if col in part: part[col] = part[col].where(part[col].isna(), part[col].astype(str).str.strip() + copy_suffix(c))
+        parts.append(part)
+    return pd.concat(parts, ignore_index=True)
+
+
+def tile_anchors(anchors, copies, total, seed=0):
+    rng = np.random.default_rng(seed)
+    per_copy = max(len(anchors), math.ceil(total / copies))
+    parts = []
+    for c in range(copies):
+        dlon, dlat = copy_offset(c)
+        extra = anchors.iloc[rng.integers(0, len(anchors), per_copy - len(anchors))]
+        part = pd.concat([anchors, extra], ignore_index=True)
+        jitter = np.zeros((len(part), 2))
+        jitter[len(anchors):] = rng.normal(0, 0.02, (len(extra), 2))
+        part['Lon'] = part['Lon'] + dlon + jitter[:, 0]
+        part['Lat'] = part['Lat'] + dlat + jitter[:, 1]
+        part['Name'] = part['Name'].astype(str) + copy_suffix(c)
+        parts.append(part)
+    return pd.concat(parts, ignore_index=True)
+
+
+def generate(out_dir, tracts=NATIONAL_TRACTS, anchors=NATIONAL_ANCHORS, source_dir=DATA_DIR, seed=0):
+    """Write a scaled copy of every source file into ``out_dir``; returns (n_tracts, n_anchors)."""
+    path = lambda d, name: os.path.join(d, name)
+    with open(path(source_dir, GEOJSON_FILE)) as f: gj = json.load(f)
+    copies = min(MAX_COPIES, max(1, math.ceil(tracts / len(gj['features']))))
+    os.makedirs(out_dir, exist_ok=True)
+
+    tiled = tile_geojson(gj, copies)
+    with open(path(out_dir, GEOJSON_FILE), "w") as f: json.dump(tiled, f, separators=(",", ":"))
+    for name, geoid_col in GEOID_COLUMNS.items():
+        df = read_csv_with_fallback(path(source_dir, name))
+        tile_table(df, copies, geoid_col, name_cols=('Parish', 'Region')).to_csv(path(out_dir, name), index=False)
+    crosswalk = read_csv_with_fallback(path(source_dir, CROSSWALK_FILE))
+    tile_table(crosswalk, copies, name_cols=('City-Town', 'Parish', 'Region')).to_csv(path(out_dir, CROSSWALK_FILE), index=False)
+    tiled_anchors = tile_anchors(read_csv_with_fallback(path(source_dir, ANCHORS_FILE)), copies, anchors, seed)
+    tiled_anchors.to_csv(path(out_dir, ANCHORS_FILE), index=False)
+    return len(tiled['features']), len(tiled_anchors)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write a scaled-up synthetic copy of the portal's source files.")
+    parser.add_argument("out_dir")
+    parser.add_argument("--tracts", type=int, default=NATIONAL_TRACTS)
+    parser.add_argument("--anchors", type=int, default=NATIONAL_ANCHORS)
+    parser.add_argument("--source-dir", default=DATA_DIR)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    n_tracts, n_anchors = generate(args.out_dir, args.tracts, args.anchors, args.source_dir, args.seed)
+    print(f"{n_tracts} tracts, {n_anchors} anchors -> {args.out_dir}")
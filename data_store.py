@@ -0,0 +1,171 @@
+"""Process-wide, read-only store for the portal's source data.
+
+Everything is loaded once per process and handed out by reference. Pandas
+copy-on-write is enabled so a session that derives a frame from the shared
+one (filtering, ``reset_index``, adding a column) never writes through to it.
+The index arrays are not writeable and the lookup mappings are read-only
+proxies; sessions that need to edit the tract table take their own copy.
+"""
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+
+import pandas as pd
+
+from geometry import TractGeometryIndex, GeometryServer
+from hierarchy import TractHierarchy
+from scoring import ScoringEngine
+from search import SearchIndex
+import shards
+from spatial import AnchorIndex, TractAnchorIndex
+import tract_table
+from tract_table import CACHE_DIR, load_tract_table, read_csv_with_fallback
+
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)  # always on (and deprecated as an option) from pandas 3
+
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+GEOJSON_FILE = "tl_2025_22_tract.json"
+ANCHORS_FILE = "la_anchors.csv"
+SOURCE_FILES = (GEOJSON_FILE, ANCHORS_FILE) + tract_table.SOURCE_FILES
+# Where the served DataStore reads from (source files or a ``shards`` build) and,
+# for a shard build, which state FIPS codes to load ("22,28"); unset means all.
+SERVE_DIR = os.environ.get("OZ_DATA_DIR") or DATA_DIR
+SERVE_STATES = tuple(s.strip() for s in os.environ.get("OZ_STATES", "").split(",") if s.strip()) or None
+
+
+def load_anchors(path):
+    anchors = read_csv_with_fallback(path)
+    anchors['Type'] = anchors['Type'].fillna('Other')
+    return anchors
+
+
+def load_geojson(path):
+    if not os.path.exists(path): return None
+    with open(path, "r") as f: return json.load(f)
+
+
+def source_signature(data_dir, files=SOURCE_FILES):
+    """(name, mtime_ns, size) per source file; changes whenever a file is replaced."""
+    sig = []
+    for name in files:
+        try:
+            info = os.stat(os.path.join(data_dir, name))
+            sig.append((name, info.st_mtime_ns, info.st_size))
+        except FileNotFoundError:
+            sig.append((name, None, None))
+    return tuple(sig)
+
+
+def signature_files(data_dir):
+    return (shards.MANIFEST_FILE,) if shards.is_partitioned(data_dir) else SOURCE_FILES
+
+
+@dataclass(frozen=True)
+class Assets:
+    master: pd.DataFrame
+    anchors: pd.DataFrame
+    anchor_index: AnchorIndex
+    tract_anchors: TractAnchorIndex
+    geometry_index: TractGeometryIndex
+    geometry_server: GeometryServer
+    hierarchy: TractHierarchy
+    scoring: ScoringEngine
+    search: SearchIndex
+    signature: tuple
+    loaded_at: float
+
+    @property
+    def tract_centers(self):
+        return self.geometry_index.centers
+
+
+def _assets(master, anchors, anchor_index, tract_anchors, geometry_index, geometry_server, crosswalk, signature):
+    hierarchy = TractHierarchy(master)
+    return Assets(
+        master=master, anchors=anchors, anchor_index=anchor_index, tract_anchors=tract_anchors,
+        geometry_index=geometry_index, geometry_server=geometry_server,
+        hierarchy=hierarchy, scoring=ScoringEngine(master, geometry_index, anchor_index, hierarchy, tract_anchors),
+        search=SearchIndex(crosswalk, master), signature=signature, loaded_at=time.time(),
+    )
+
+
+def load_assets(data_dir=DATA_DIR, cache_dir=CACHE_DIR, states=None):
+    """Load and index every source file; the raw GeoJSON is not retained.
+
+    If ``data_dir`` holds a ``shards`` build, only ``states`` (default: all)
+    are read and tract geometry stays on disk until a map needs it.
+    """
+    if shards.is_partitioned(data_dir): return load_sharded_assets(data_dir, states)
+    path = lambda name: os.path.join(data_dir, name)
+    signature = source_signature(data_dir)
+    gj = load_geojson(path(GEOJSON_FILE))
+    master = load_tract_table(data_dir, cache_dir)
+    anchors = load_anchors(path(ANCHORS_FILE))
+    geometry_index = TractGeometryIndex(gj)
+    geometry_server = GeometryServer(gj, geometry_index)
+    anchor_index = AnchorIndex(anchors)
+    tract_anchors = TractAnchorIndex(anchor_index.anchors, geometry_index, geometry_server.levels[0])
+    crosswalk = read_csv_with_fallback(path(tract_table.CROSSWALK_FILE))
+    return _assets(master, anchors, anchor_index, tract_anchors, geometry_index, geometry_server, crosswalk, signature)
+
+
+def load_sharded_assets(data_dir, states=None, max_shards=shards.SHARD_CACHE_SIZE):
+    """Assets over a ``shards`` build; anchors keep the tract assignment computed at build time."""
+    signature = source_signature(data_dir, signature_files(data_dir))
+    manifest = shards.read_manifest(data_dir)
+    master = shards.load_tracts(data_dir, manifest, states)
+    geometry_index = shards.load_geometry_index(data_dir, manifest, states)
+    geometry_server = shards.ShardedGeometryServer(os.path.join(data_dir, manifest['build'], "geometry"), geometry_index, max_shards)
+    anchors, anchor_tracts = shards.load_anchor_shard(data_dir, manifest, states)
+    anchor_index = AnchorIndex(anchors)
+    tract_anchors = TractAnchorIndex(anchor_index.anchors, geometry_index, tract_of_anchor=geometry_index.geoids.get_indexer(anchor_tracts))
+    crosswalk = shards.load_crosswalk(data_dir, manifest)
+    return _assets(master, anchors, anchor_index, tract_anchors, geometry_index, geometry_server, crosswalk, signature)
+
+
+class DataStore:
+    """Holds the current ``Assets`` and swaps in a fresh load when a source file changes.
+
+    ``get()`` costs a few ``os.stat`` calls; readers always receive the same
+    object until a reload, and a reload replaces the reference atomically so
+    in-flight reruns keep the snapshot they started with.
+    """
+
+    def __init__(self, data_dir=SERVE_DIR, check_interval=5.0, states=SERVE_STATES):
+        self.data_dir = data_dir
+        self.states = states
+        self.check_interval = check_interval
+        self._assets = None
+        self.loads = 0
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self):
+        assets = self._assets
+        now = time.monotonic()
+        if assets is not None and now - self._checked_at < self.check_interval:
+            return assets
+        self._checked_at = now
+        if assets is not None and source_signature(self.data_dir, signature_files(self.data_dir)) == assets.signature:
+            return assets
+        return self.reload(stale=assets)
+
+    def reload(self, stale=None):
+        """Rebuild the assets unless another thread already replaced ``stale``."""
+        with self._lock:
+            if self._assets is not stale:
+                return self._assets
+            self._assets = load_assets(self.data_dir, states=self.states)
+            self.loads += 1
+            return self._assets
+
+    def refresh(self):
+        """Force a reload regardless of the source signature."""
+        return self.reload(stale=self._assets)
+
+    @property
+    def loaded(self):
+        return self._assets is not None
@@ -0,0 +1,207 @@
+"""Per-tract geometry index built once from the tract GeoJSON."""
+from functools import cached_property
+from types import MappingProxyType
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_CENTER = {"lat": 30.9, "lon": -91.8}
+DEFAULT_ZOOM = 6.0
+
+
+def resolve_id_key(gj):
+    """Property name that holds the tract GEOID ('GEOID' or 'GEOID20')."""
+    props = gj['features'][0]['properties'] if gj and gj.get('features') else {}
+    return "GEOID" if "GEOID" in props else "GEOID20"
+
+
+def polygons_of(geom):
+    if geom['type'] == 'Polygon': return [geom['coordinates']]
+    if geom['type'] == 'MultiPolygon': return geom['coordinates']
+    return []
+
+
+def _ring_area_centroid(ring):
+    # Shoelace over a closed or open ring; returns unsigned area and centroid.
+    x, y = ring[:, 0], ring[:, 1]
+    xn, yn = np.roll(x, -1), np.roll(y, -1)
+    cross = x * yn - xn * y
+    a = cross.sum() / 2
+    if a == 0: return 0.0, x.mean(), y.mean()
+    return abs(a), ((x + xn) * cross).sum() / (6 * a), ((y + yn) * cross).sum() / (6 * a)
+
+
+def zoom_for_span(max_diff):
+    if max_diff == 0: return 12.5
+    elif max_diff < 0.05: return 12.0
+    elif max_diff < 0.1: return 11.0
+    elif max_diff < 0.3: return 10.0
+    elif max_diff < 0.8: return 8.5
+    elif max_diff < 1.5: return 7.5
+    return 6.2
+
+
+class TractGeometryIndex:
+    """Bounding box, area-weighted centroid and vertex count per GEOID.
+
+    Rows line up with ``gj['features']`` so other layers can slice features
+    by position. Holes are subtracted from the centroid and every part of a
+    MultiPolygon contributes, unlike a mean of the first ring's vertices.
+    """
+
+    def __init__(self, gj):
+        self.id_key = resolve_id_key(gj)
+        features = gj['features'] if gj else []
+        n = len(features)
+        self.bbox = np.full((n, 4), np.nan)  # min_lon, min_lat, max_lon, max_lat
+        self.centroid = np.full((n, 2), np.nan)  # lon, lat
+        self.vertex_count = np.zeros(n, dtype=np.int64)
+        geoids = []
+        for i, feature in enumerate(features):
+            geoids.append(str(feature['properties'].get(self.id_key)))
+            total, cx, cy, verts = 0.0, 0.0, 0.0, []
+            for poly in polygons_of(feature.get('geometry') or {'type': None}):
+                for j, ring in enumerate(poly):
+                    pts = np.asarray(ring, dtype=float)[:, :2]
+                    if len(pts) == 0: continue
+                    verts.append(pts)
+                    area, rx, ry = _ring_area_centroid(pts)
+                    sign = 1.0 if j == 0 else -1.0
+                    total += sign * area; cx += sign * area * rx; cy += sign * area * ry
+            if not verts: continue
+            pts = np.concatenate(verts)
+            self.vertex_count[i] = len(pts)
+            self.bbox[i] = [pts[:, 0].min(), pts[:, 1].min(), pts[:, 0].max(), pts[:, 1].max()]
+            self.centroid[i] = [cx / total, cy / total] if total > 0 else pts.mean(axis=0)
+        self.geoids = pd.Index(geoids)
+        self._freeze()
+
+    @classmethod
+    def from_arrays(cls, geoids, bbox, centroid, vertex_count, id_key="GEOID"):
+        """Index over precomputed rows (e.g. from a shard build) without reading any geometry."""
+        index = cls.__new__(cls)
+        index.id_key = id_key
+        index.bbox = np.asarray(bbox, dtype=float).reshape(-1, 4)
+        index.centroid = np.asarray(centroid, dtype=float).reshape(-1, 2)
+        index.vertex_count = np.asarray(vertex_count, dtype=np.int64)
+        index.geoids = pd.Index([str(g) for g in geoids])
+        index._freeze()
+        return index
+
+    def _freeze(self):
+        for arr in (self.bbox, self.centroid, self.vertex_count): arr.flags.writeable = False
+
+    def __len__(self):
+        return len(self.geoids)
+
+    def positions(self, geoids):
+        """Row positions of the given GEOIDs; unknown ids are dropped."""
+        pos = self.geoids.get_indexer(pd.Index([str(g) for g in geoids]))
+        return pos[pos >= 0]
+
+    @cached_property
+    def centers(self):
+        """Read-only {GEOID: (lon, lat)} for every tract with geometry."""
+        ok = ~np.isnan(self.centroid[:, 0])
+        return MappingProxyType(dict(zip(self.geoids[ok], map(tuple, self.centroid[ok].tolist()))))
+
+    def bounds(self, geoids):
+        """(min_lon, min_lat, max_lon, max_lat) over the given GEOIDs, or None."""
+        box = self.bbox[self.positions(geoids)]
+        box = box[~np.isnan(box[:, 0])]
+        if not len(box): return None
+        return box[:, 0].min(), box[:, 1].min(), box[:, 2].max(), box[:, 3].max()
+
+    def zoom_center(self, geoids):
+        b = self.bounds(geoids) if geoids else None
+        if b is None: return dict(DEFAULT_CENTER), DEFAULT_ZOOM
+        min_lon, min_lat, max_lon, max_lat = map(float, b)
+        center = {"lat": (min_lat + max_lat) / 2, "lon": (min_lon + max_lon) / 2}
+        return center, zoom_for_span(max(max_lat - min_lat, max_lon - min_lon))
+
+
+# --- LEVEL-OF-DETAIL SERVING ---
+# Douglas-Peucker tolerances in degrees and the minimum map zoom at which each
+# level is served. A pixel is ~0.02 deg at the statewide zoom (6.2) and
+# ~0.008 deg at the region zoom (7.5); the source rings are already sparse,
+# so only the statewide view gets a coarser copy (0.01 deg, half a pixel).
+LOD_TOLERANCES = (0.0, 0.01)
+LOD_MIN_ZOOM = (7.5, 0.0)
+
+
+def vertex_count(feature):
+    return sum(len(r) for p in polygons_of(feature['geometry']) for r in p)
+
+
+def simplify_line(pts, tol):
+    """Douglas-Peucker simplification of an (n, 2) array; endpoints are kept."""
+    n = len(pts)
+    if tol <= 0 or n < 3: return pts
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        lo, hi = stack.pop()
+        if hi - lo < 2: continue
+        a, b, seg = pts[lo], pts[hi], pts[lo + 1:hi]
+        ab = b - a
+        norm = np.hypot(ab[0], ab[1])
+        if norm == 0: d = np.hypot(seg[:, 0] - a[0], seg[:, 1] - a[1])
+        else: d = np.abs(ab[0] * (seg[:, 1] - a[1]) - ab[1] * (seg[:, 0] - a[0])) / norm
+        i = int(np.argmax(d))
+        if d[i] > tol:
+            keep[lo + 1 + i] = True
+            stack.append((lo, lo + 1 + i)); stack.append((lo + 1 + i, hi))
+    return pts[keep]
+
+
+def simplify_ring(ring, tol):
+    pts = np.asarray(ring, dtype=float)[:, :2]
+    if tol <= 0 or len(pts) <= 5: return pts
+    # Split the closed ring at its farthest vertex so both halves have a fixed anchor.
+    far = int(np.argmax(np.hypot(pts[:, 0] - pts[0, 0], pts[:, 1] - pts[0, 1])))
+    out = np.concatenate([simplify_line(pts[:far + 1], tol)[:-1], simplify_line(pts[far:], tol)])
+    return out if len(out) >= 4 else pts
+
+
+class GeometryServer:
+    """Pre-simplified, minimal-property copies of the tract features per LOD.
+
+    ``feature_collection`` hands Plotly only the features for the GEOIDs on
+    screen at the detail level suited to the zoom, instead of the full file.
+    """
+
+    sharded = False
+
+    def __init__(self, gj, index=None):
+        self.index = index or TractGeometryIndex(gj)
+        self.id_key = self.index.id_key
+        self.featureidkey = f"properties.{self.id_key}"
+        features = gj['features'] if gj else []
+        self.levels = []
+        for tol in LOD_TOLERANCES:
+            level = [self._lean(f, tol) for f in features]
+            # Features the tolerance leaves untouched share the finer level's copy
+            if self.levels: level = [fine if vertex_count(fine) == vertex_count(lean) else lean for fine, lean in zip(self.levels[-1], level)]
+            self.levels.append(level)
+
+    def _lean(self, feature, tol):
+        geom = feature.get('geometry') or {'type': None}
+        polys = [[simplify_ring(r, tol).tolist() for r in poly] for poly in polygons_of(geom)]
+        if geom['type'] == 'Polygon': geom = {'type': 'Polygon', 'coordinates': polys[0]}
+        elif geom['type'] == 'MultiPolygon': geom = {'type': 'MultiPolygon', 'coordinates': polys}
+        return {'type': 'Feature', 'geometry': geom, 'properties': {self.id_key: feature['properties'].get(self.id_key)}}
+
+    @staticmethod
+    def level_for_zoom(zoom):
+        for level, min_zoom in enumerate(LOD_MIN_ZOOM):
+            if zoom >= min_zoom: return level
+        return len(LOD_MIN_ZOOM) - 1
+
+    def vertex_counts(self):
+        """Total vertices served at each level, for sizing the tolerances."""
+        return [sum(vertex_count(f) for f in lvl) for lvl in self.levels]
+
+    def feature_collection(self, geoids, zoom=DEFAULT_ZOOM):
+        features = self.levels[self.level_for_zoom(zoom)]
+        return {'type': 'FeatureCollection', 'features': [features[i] for i in self.index.positions(geoids)]}
@@ -0,0 +1,78 @@
+"""Region -> Parish -> tract index and the per-parish allocation quota table."""
+import math
+from collections import namedtuple
+from types import MappingProxyType
+
+import numpy as np
+
+QUOTA_SHARE = 0.25
+ParishQuota = namedtuple('ParishQuota', ['total_tracts', 'eligible_tracts', 'max_selections'])
+
+
+def quota_for(n_eligible, share=QUOTA_SHARE):
+    """Selections allowed for a parish: ``share`` of its eligible tracts rounded down, so the
+    cap never exceeds the share (0 for parishes with fewer than four eligible tracts)."""
+    return max(0, math.floor(n_eligible * share))
+
+
+class TractHierarchy:
+    """Row positions of the tract table grouped by region and parish, built once.
+
+    ``slice`` turns the Section 5 filters into a positional ``iloc``, and
+    ``quotas`` maps each parish to its total/eligible tract counts and 25% cap.
+    Everything is shared across sessions, so the mappings are read-only
+    proxies and the position arrays are not writeable.
+    """
+
+    def __init__(self, master):
+        region = master['Region'].astype(str).to_numpy()
+        parish = master['Parish'].astype(str).to_numpy()
+        known = master['Region'].notna().to_numpy() & master['Parish'].notna().to_numpy()
+        self._all = np.arange(len(master))
+        self._by_region, self._by_parish, self._by_pair = {}, {}, {}
+        for pos in np.flatnonzero(known):
+            self._by_region.setdefault(region[pos], []).append(pos)
+            self._by_parish.setdefault(parish[pos], []).append(pos)
+            self._by_pair.setdefault((region[pos], parish[pos]), []).append(pos)
+        for index in (self._by_region, self._by_parish, self._by_pair):
+            for key, rows in index.items(): index[key] = np.asarray(rows, dtype=np.int64)
+        for rows in (self._all, *self._by_region.values(), *self._by_parish.values(), *self._by_pair.values()): rows.flags.writeable = False
+        self.regions = tuple(sorted(self._by_region))
+        self._region_parishes = {r: sorted(p for (r2, p) in self._by_pair if r2 == r) for r in self.regions}
+        self._all_parishes = sorted(self._by_parish)
+        self.parish_of = MappingProxyType(dict(zip(master['geoid_str'].astype(str), parish)))
+
+        eligible = (master['Eligibility_Status'] == 'Eligible').to_numpy()
+        quotas = {}
+        for p in self._all_parishes:
+            pos = self._by_parish[p]
+            n_eligible = int(eligible[pos].sum())
+            quotas[p] = ParishQuota(len(pos), n_eligible, quota_for(n_eligible))
+        self.quotas = MappingProxyType(quotas)
+
+    def parishes(self, region=None):
+        if region is None: return list(self._all_parishes)
+        return list(self._region_parishes.get(region, []))
+
+    def positions(self, region=None, parish=None):
+        if region is None and parish is None: return self._all
+        if parish is None: return self._by_region.get(region, self._all[:0])
+        if region is None: return self._by_parish.get(parish, self._all[:0])
+        return self._by_pair.get((region, parish), self._all[:0])
+
+    def slice(self, master, region=None, parish=None):
+        pos = self.positions(region, parish)
+        return master if len(pos) == len(master) else master.iloc[pos]
+
+    def max_selections(self, parish):
+        quota = self.quotas.get(str(parish))
+        return quota.max_selections if quota else 0
+
+    def saved_by_parish(self, recs):
+        """{parish: set of saved tract GEOIDs} for a user's recommendation rows."""
+        saved = {}
+        for rec in recs:
+            tract = str(rec.get('Tract'))
+            parish = self.parish_of.get(tract, str(rec.get('Parish')))
+            saved.setdefault(parish, set()).add(tract)
+        return saved
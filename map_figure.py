@@ -0,0 +1,123 @@
+"""Cached Section 5 map figures, patched per rerun instead of rebuilt."""
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import numpy as np
+import plotly.express as px
+import plotly.graph_objects as go
+
+SHARDED_MAX_CACHED_FEATURES = 2000  # larger sharded views pull in many county shards; don't pin them
+CHORO_COLORSCALE = [[0, '#e2e8f0'], [0.5, '#4ade80'], [1, '#f97316']]
+MAP_LEGEND = dict(title=dict(text="<b>Toggle Anchor Assets</b>", font=dict(size=12)), yanchor="top", y=0.98, xanchor="left", x=0.02, bgcolor="rgba(255, 255, 255, 0.9)", font=dict(size=11, color="#1e293b"), bordercolor="#cbd5e1", borderwidth=1)
+
+
+def anchor_traces(anchors):
+    """One legend-only marker trace per anchor Type, built from a single groupby."""
+    traces = []
+    color_palette = px.colors.qualitative.Bold
+    for i, (a_type, type_data) in enumerate(anchors.groupby('Type', sort=True)):
+        marker_color = "#f97316" if a_type == "Project Announcements" else color_palette[i % len(color_palette)]
+        marker_symbol = "star" if a_type == "Project Announcements" else "circle"
+        marker_size = 15 if a_type == "Project Announcements" else 11
+        traces.append(go.Scattermapbox(
+            lat=type_data['Lat'], lon=type_data['Lon'], mode='markers',
+            marker=go.scattermapbox.Marker(size=marker_size, color=marker_color, symbol=marker_symbol),
+            text=type_data['Name'], hoverinfo='text', name=f"{a_type}", visible="legendonly"
+        ))
+    return traces
+
+
+def color_categories(geoids, eligible, selected_geoids):
+    """0 ineligible, 1 eligible, 2 saved to the report."""
+    return np.where(np.isin(geoids, list(selected_geoids)), 2, eligible)
+
+
+def figure_cache_for(geometry_server, anchors):
+    """``MapFigureCache`` sized for the server: sharded builds only keep views up to ``SHARDED_MAX_CACHED_FEATURES``."""
+    return MapFigureCache(geometry_server, anchors, max_cached_features=SHARDED_MAX_CACHED_FEATURES if geometry_server.sharded else None)
+
+
+def spans_states(df):
+    """True if the tracts in ``df`` belong to more than one state (first two GEOID digits)."""
+    return df['geoid_str'].astype(str).str[:2].nunique() > 1
+
+
+class _Entry:
+    def __init__(self, fig, geoids, eligible):
+        self.fig, self.geoids, self.eligible = fig, geoids, eligible
+        self.lock = threading.Lock()
+
+
+class MapFigureCache:
+    """LRU of base map figures keyed by (region, parish, level of detail).
+
+    A base figure holds the static layers: the choropleth geometry and
+    locations for the filtered tracts and the anchor marker traces. ``figure``
+    patches only the per-rerun state (color categories, selected tract and
+    camera) in place and yields the figure while holding its lock, so render
+    it inside the ``with`` block. Views of more than ``max_cached_features``
+    tracts are built for the rerun and not kept.
+    """
+
+    def __init__(self, geometry_server, anchors, max_entries=16, max_cached_features=None):
+        self.geometry_server = geometry_server
+        self.max_entries = max_entries
+        self.max_cached_features = max_cached_features
+        self.hits = self.misses = 0
+        self._anchor_traces = anchor_traces(anchors)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _build(self, df, zoom):
+        geoids = df['geoid_str'].astype(str).to_numpy()
+        eligible = (df['Eligibility_Status'] == 'Eligible').to_numpy().astype(np.int8)
+        fig = go.Figure()
+        fig.add_trace(go.Choroplethmapbox(
+            geojson=self.geometry_server.feature_collection(geoids, zoom), locations=geoids, z=eligible,
+            featureidkey=self.geometry_server.featureidkey,
+            colorscale=CHORO_COLORSCALE, zmin=0, zmax=2,
+            showscale=False, marker=dict(opacity=0.6, line=dict(width=1.2, color='black')),
+            hoverinfo="location", name="Census Tracts"
+        ))
+        fig.add_traces(self._anchor_traces)
+        fig.update_layout(
+            mapbox=dict(style="carto-positron"),
+            margin={"r":0,"t":0,"l":0,"b":0}, paper_bgcolor='rgba(0,0,0,0)', height=700,
+            clickmode='event+select', legend=MAP_LEGEND
+        )
+        return _Entry(fig, geoids, eligible)
+
+    def _entry(self, key, df, zoom):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+        entry = self._build(df, zoom)
+        if self.max_cached_features is not None and len(df) > self.max_cached_features: return entry
+        with self._lock:
+            entry = self._entries.setdefault(key, entry)
+            while len(self._entries) > self.max_entries: self._entries.popitem(last=False)
+        return entry
+
+    @contextmanager
+    def figure(self, key, df, selected_geoids, active_tract=None):
+        """Patched figure for the tracts in ``df``; ``key`` must identify ``df`` (e.g. region, parish)."""
+        geoids = df['geoid_str']
+        focus_geoids = {active_tract} if active_tract and (geoids == active_tract).any() else set(geoids.tolist())
+        center, zoom = self.geometry_server.index.zoom_center(focus_geoids)
+        entry = self._entry((*key, self.geometry_server.level_for_zoom(zoom)), df, zoom)
+        z = color_categories(entry.geoids, entry.eligible, selected_geoids)
+        sel_idx = np.flatnonzero(entry.geoids == active_tract).tolist() if active_tract else []
+        revision_key = "_".join(sorted(focus_geoids)) if len(focus_geoids) < 5 else str(hash(tuple(sorted(focus_geoids))))
+        with entry.lock:
+            with entry.fig.batch_update():
+                entry.fig.data[0].z = z
+                entry.fig.data[0].selectedpoints = sel_idx
+                entry.fig.layout.mapbox.center = center
+                entry.fig.layout.mapbox.zoom = zoom
+                entry.fig.layout.uirevision = revision_key
+            yield entry.fig
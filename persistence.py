@@ -0,0 +1,292 @@
+"""Recommendation persistence: append-only backends and a write-behind queue.
+
+Backends only ever append rows; nothing reads the whole sheet back just to
+add one line. ``WriteBehindQueue`` batches rows from every session in a
+background thread so the UI can update its local state immediately.
+"""
+import atexit
+import logging
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+
+import pandas as pd
+
+log = logging.getLogger(__name__)
+
+REC_COLUMNS = ["username", "Tract", "Parish", "Category", "Justification", "Population", "Poverty", "MFI", "Broadband"]
+_SQL_COLUMNS = ", ".join(f'"{c}"' for c in REC_COLUMNS)
+
+
+def _sql_value(v):
+    if v is None or (isinstance(v, float) and v != v): return None
+    if isinstance(v, (bool, int, float, str)): return v
+    return v.item() if hasattr(v, 'item') else str(v)
+
+
+def _records(df):
+    if df is None or df.empty or 'username' not in df: return []
+    if 'Tract' in df:
+        # Rows appended before values were written RAW hold the GEOID as a number without its leading zero
+        tract = df['Tract'].astype(str).str.split('.').str[0].str.zfill(11)
+        df = df.assign(Tract=tract.where(df['Tract'].notna(), None))
+    return df.to_dict('records')
+
+
+class RecommendationBackend(ABC):
+    """Interface: ``append`` a batch of row dicts, ``read_user``/``read_all`` saved rows.
+
+    ``change_marker`` must be cheap and change whenever rows may have been
+    added; ``row_count`` is the number of saved rows. ``round_trips`` counts
+    calls made to the underlying store.
+    """
+    round_trips = 0
+
+    @abstractmethod
+    def append(self, rows): ...
+
+    @abstractmethod
+    def read_all(self): ...
+
+    def change_marker(self):
+        return self.row_count()
+
+    def row_count(self):
+        return len(self.read_all())
+
+    def read_user(self, username):
+        return [r for r in self.read_all() if str(r.get('username')) == str(username)]
+
+
+class GSheetsBackend(RecommendationBackend):
+    """Google Sheets worksheet, appended to with one ``append_rows`` call per batch.
+
+    ``conn_factory`` returns a ``GSheetsConnection``; it is called lazily so
+    this module stays importable without Streamlit.
+    """
+
+    def __init__(self, conn_factory, worksheet="Recommendations"):
+        self.conn_factory = conn_factory
+        self.worksheet = worksheet
+        self._header = None
+        self._ws = None
+
+    def _sheet(self):
+        # gspread Worksheet behind the service-account client
+        if self._ws is None:
+            self.round_trips += 1
+            self._ws = self.conn_factory().client._select_worksheet(worksheet=self.worksheet)
+        return self._ws
+
+    def append(self, rows):
+        if not rows: return
+        ws = self._sheet()
+        if self._header is None:
+            self.round_trips += 1
+            self._header = [h.strip() for h in ws.row_values(1)]
+            if not self._header:
+                self.round_trips += 1
+                self._header = list(REC_COLUMNS)
+                ws.append_row(self._header, value_input_option="RAW")
+        values = [["" if pd.isna(r.get(h)) else r.get(h) for h in self._header] for r in rows]
+        self.round_trips += 1
+        ws.append_rows(values, value_input_option="RAW")
+
+    def read_all(self):
+        self.round_trips += 1
+        return _records(self.conn_factory().read(worksheet=self.worksheet, ttl=0))
+
+    def change_marker(self):
+        # Drive modifiedTime: one metadata call, no cell data
+        ws = self._sheet()
+        self.round_trips += 1
+        return ws.spreadsheet.get_lastUpdateTime()
+
+    def row_count(self):
+        ws = self._sheet()
+        self.round_trips += 1
+        return max(len(ws.col_values(1)) - 1, 0)
+
+
+class SQLiteBackend(RecommendationBackend):
+    """Local SQLite table with a username index; used for development and tests."""
+
+    def __init__(self, path=":memory:"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._db:
+            self._db.execute(f"CREATE TABLE IF NOT EXISTS recommendations (id INTEGER PRIMARY KEY AUTOINCREMENT, {_SQL_COLUMNS}, saved_at REAL)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS recommendations_username ON recommendations (username)")
+
+    def append(self, rows):
+        if not rows: return
+        placeholders = ", ".join("?" for _ in REC_COLUMNS)
+        now = time.time()
+        values = [tuple(_sql_value(r.get(c)) for c in REC_COLUMNS) + (now,) for r in rows]
+        with self._lock, self._db:
+            self.round_trips += 1
+            self._db.executemany(f"INSERT INTO recommendations ({_SQL_COLUMNS}, saved_at) VALUES ({placeholders}, ?)", values)
+
+    def _select(self, where="", params=()):
+        with self._lock:
+            self.round_trips += 1
+            cur = self._db.execute(f"SELECT {_SQL_COLUMNS} FROM recommendations {where} ORDER BY id", params)
+            return [dict(zip(REC_COLUMNS, row)) for row in cur.fetchall()]
+
+    def read_all(self):
+        return self._select()
+
+    def read_user(self, username):
+        return self._select("WHERE username = ?", (str(username),))
+
+    def change_marker(self):
+        with self._lock:
+            self.round_trips += 1
+            return self._db.execute("SELECT max(id) FROM recommendations").fetchone()[0]
+
+    def row_count(self):
+        with self._lock:
+            self.round_trips += 1
+            return self._db.execute("SELECT count(*) FROM recommendations").fetchone()[0]
+
+
+class RecommendationCache(RecommendationBackend):
+    """Process-wide, username-indexed view of a backend's rows.
+
+    Writes that go through ``append`` update the index in place. Rows written
+    elsewhere are picked up by a full reload only when, at most every
+    ``check_interval`` seconds, the backend's change marker has moved and its
+    row count no longer matches what the index has seen.
+    """
+
+    def __init__(self, backend, check_interval=15.0):
+        self.backend = backend
+        self.check_interval = check_interval
+        self.refreshes = 0
+        self._by_user = None
+        self._rows_seen = 0
+        self._marker = None
+        self._checked_at = 0.0
+        self._lock = threading.RLock()
+
+    def refresh(self):
+        with self._lock:
+            marker = self.backend.change_marker()
+            by_user = {}
+            for row in self.backend.read_all():
+                by_user.setdefault(str(row.get('username')), []).append(row)
+            self._by_user, self._marker = by_user, marker
+            self._rows_seen = self.backend.row_count()
+            self._checked_at = time.monotonic()
+            self.refreshes += 1
+
+    def _ensure_current(self):
+        with self._lock:
+            if self._by_user is None: return self.refresh()
+            if time.monotonic() - self._checked_at < self.check_interval: return
+            self._checked_at = time.monotonic()
+            marker = self.backend.change_marker()
+            if marker == self._marker: return
+            if self.backend.row_count() != self._rows_seen: return self.refresh()
+            self._marker = marker
+
+    def append(self, rows):
+        self.backend.append(rows)
+        with self._lock:
+            if self._by_user is None: return
+            for row in rows:
+                self._by_user.setdefault(str(row.get('username')), []).append(dict(row))
+            self._rows_seen += len(rows)
+
+    def read_user(self, username):
+        with self._lock:
+            self._ensure_current()
+            return [dict(r) for r in self._by_user.get(str(username), [])]
+
+    def read_all(self):
+        with self._lock:
+            self._ensure_current()
+            return [dict(r) for rows in self._by_user.values() for r in rows]
+
+    def change_marker(self):
+        return self.backend.change_marker()
+
+    def row_count(self):
+        return self.backend.row_count()
+
+
+class WriteBehindQueue:
+    """Batches appended rows and writes them to ``backend`` from a daemon thread.
+
+    Rows are flushed every ``flush_interval`` seconds or as soon as
+    ``max_batch`` are waiting. A failed batch stays at the head of the queue
+    and is retried with exponential backoff; ``last_error`` holds the most
+    recent failure for the UI to surface. ``flushed`` counts rows written.
+    """
+
+    def __init__(self, backend, flush_interval=2.0, max_batch=100, max_backoff=60.0):
+        self.backend = backend
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.max_backoff = max_backoff
+        self.last_error = None
+        self.flushed = 0
+        self._pending = []
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._failures = 0
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="rec-write-behind", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def put(self, row):
+        with self._cond:
+            self._pending.append(dict(row))
+            if len(self._pending) >= self.max_batch: self._cond.notify()
+
+    def pending(self, username=None):
+        with self._cond:
+            return [dict(r) for r in self._pending if username is None or str(r.get('username')) == str(username)]
+
+    def read_user(self, username):
+        """Saved rows for ``username`` plus their queued ones, read while no batch is in flight."""
+        with self._flush_lock:
+            return self.backend.read_user(username) + self.pending(username)
+
+    def flush(self):
+        """Write everything queued so far; returns the number of rows written."""
+        written = 0
+        with self._flush_lock:
+            while True:
+                with self._cond:
+                    batch = self._pending[:self.max_batch]
+                if not batch: return written
+                try:
+                    self.backend.append(batch)
+                except Exception as e:
+                    self.last_error = e
+                    self._failures += 1
+                    log.warning("Recommendation write failed (%d pending): %s", len(self._pending), e)
+                    return written
+                with self._cond:
+                    del self._pending[:len(batch)]
+                self.last_error, self._failures = None, 0
+                self.flushed += len(batch)
+                written += len(batch)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if self._closed: return
+                wait = self.flush_interval if not self._failures else min(self.max_backoff, self.flush_interval * 2 ** self._failures)
+                self._cond.wait(wait)
+            self.flush()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self.flush()
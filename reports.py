@@ -0,0 +1,205 @@
+"""Headless recommendation reports: saved rows joined with tract metrics and nearest anchors.
+
+Reports are grouped per user, parish or region (or one file for all rows).
+Rows are enriched parish by parish in a process pool and appended to the
+open output files as each parish finishes, so no report is ever held in
+memory whole. Run ``python reports.py --help`` for the CLI.
+"""
+import argparse
+import csv
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from data_store import DATA_DIR, load_assets
+from persistence import REC_COLUMNS, SQLiteBackend, GSheetsBackend
+from tract_table import NUMERIC_FIELDS, TEXT_FIELDS
+
+GROUP_COLUMNS = {'user': 'username', 'parish': 'Parish', 'region': 'Region', 'all': None}
+FORMATS = ('csv', 'xlsx')
+IDENTITY_COLUMNS = ['Region', 'Eligibility_Status', 'NMTC_Calculated', 'oz1_tract']
+DEFAULT_NEAREST = 3
+
+
+class ReportBuilder:
+    """Joins recommendation rows with the tract table and their nearest anchors.
+
+    Holds only what the join needs (tract table, anchor index, tract centers
+    and in-tract anchor counts), so it is cheap to pickle into pool workers.
+    """
+
+    def __init__(self, master, anchor_index, tract_centers, tract_anchors, nearest=DEFAULT_NEAREST):
+        metric_columns = [c for c in (*TEXT_FIELDS, *NUMERIC_FIELDS) if c in master and c not in ('redo_region',)]
+        self.master = master[[c for c in IDENTITY_COLUMNS if c in master] + metric_columns]
+        self.anchor_index = anchor_index
+        self.tract_centers = tract_centers
+        self.tract_anchors = tract_anchors
+        self.nearest = nearest
+        self.columns = REC_COLUMNS + list(self.master.columns) + ['anchors_inside'] + [
+            f"anchor_{i}{suffix}" for i in range(1, nearest + 1) for suffix in ('', '_type', '_miles')]
+
+    @classmethod
+    def from_assets(cls, assets, nearest=DEFAULT_NEAREST):
+        return cls(assets.master, assets.anchor_index, assets.tract_centers, assets.tract_anchors, nearest)
+
+    def _nearest_anchors(self, geoid):
+        values = [None] * (3 * self.nearest)
+        if geoid not in self.tract_centers: return values
+        lon, lat = self.tract_centers[geoid]
+        rows, dist = self.anchor_index.nearest(lat, lon, k=self.nearest)
+        anchors = self.anchor_index.anchors
+        for i, (row, d) in enumerate(zip(rows, dist)):
+            values[3 * i:3 * i + 3] = [anchors.at[row, 'Name'], anchors.at[row, 'Type'], round(float(d), 2)]
+        return values
+
+    def enrich(self, recs):
+        """``recs`` (REC_COLUMNS frame) with tract metrics, in-tract anchor count and nearest anchors appended."""
+        recs = recs.reindex(columns=REC_COLUMNS).reset_index(drop=True)
+        geoids = recs['Tract'].astype(str)
+        metrics = self.master.reindex(geoids).reset_index(drop=True)
+        inside = pd.Series(self.tract_anchors.counts(geoids), name='anchors_inside')
+        nearest_cols = self.columns[len(REC_COLUMNS) + len(self.master.columns) + 1:]
+        nearest = pd.DataFrame([self._nearest_anchors(g) for g in geoids], columns=nearest_cols)
+        return pd.concat([recs, metrics, inside, nearest], axis=1)
+
+
+def safe_name(value):
+    return re.sub(r'[^A-Za-z0-9._-]+', '_', str(value)).strip('_') or 'unknown'
+
+
+def _cell(v):
+    if v is None or (isinstance(v, float) and v != v): return None
+    return v.item() if isinstance(v, np.generic) else v
+
+
+class _CsvSink:
+    def __init__(self, path, columns):
+        self.path, self.rows = path, 0
+        self._f = open(path, "w", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._f)
+        self._writer.writerow(columns)
+
+    def write(self, df):
+        self._writer.writerows([_cell(v) for v in row] for row in df.itertuples(index=False, name=None))
+        self.rows += len(df)
+
+    def close(self):
+        self._f.close()
+
+
+class _XlsxSink:
+    """openpyxl write-only workbook: rows go to a temporary file until ``save``."""
+
+    def __init__(self, path, columns):
+        try:
+            from openpyxl import Workbook
+        except ImportError as e:
+            raise RuntimeError("Excel output needs openpyxl (pip install openpyxl)") from e
+        self.path, self.rows = path, 0
+        self._wb = Workbook(write_only=True)
+        self._ws = self._wb.create_sheet("Recommendations")
+        self._ws.append(columns)
+
+    def write(self, df):
+        for row in df.itertuples(index=False, name=None): self._ws.append([_cell(v) for v in row])
+        self.rows += len(df)
+
+    def close(self):
+        self._wb.save(self.path)
+
+
+_SINKS = {'csv': _CsvSink, 'xlsx': _XlsxSink}
+_worker_builder = None
+
+
+def _init_worker(builder):
+    global _worker_builder
+    _worker_builder = builder
+
+
+def _enrich_chunk(recs):
+    return _worker_builder.enrich(recs)
+
+
+def parish_chunks(recs, hierarchy=None):
+    """Recommendation rows split by parish (tract table parish where known), in parish order."""
+    parish = recs['Parish'].astype(str)
+    if hierarchy is not None: parish = recs['Tract'].astype(str).map(hierarchy.parish_of).fillna(parish)
+    return [chunk for _, chunk in recs.groupby(parish.to_numpy(), sort=True)]
+
+
+def write_reports(recs, builder, out_dir, by='parish', fmt='csv', workers=None, hierarchy=None, only=None):
+    """Write one report per ``by`` group into ``out_dir``; returns {path: row count}.
+
+    ``workers=1`` enriches in this process; otherwise parishes are spread over
+    a process pool of ``workers`` (default: CPU count). ``only`` restricts
+    the output to the listed group values.
+    """
+    if by not in GROUP_COLUMNS: raise ValueError(f"by must be one of {sorted(GROUP_COLUMNS)}")
+    if fmt not in FORMATS: raise ValueError(f"fmt must be one of {FORMATS}")
+    recs = pd.DataFrame(recs, columns=REC_COLUMNS) if not isinstance(recs, pd.DataFrame) else recs
+    recs = recs.dropna(subset=['Tract'])
+    recs['Tract'] = recs['Tract'].astype(str).str.replace(r'\.0$', '', regex=True).str.zfill(11)
+    os.makedirs(out_dir, exist_ok=True)
+    chunks = parish_chunks(recs, hierarchy)
+    group_col = GROUP_COLUMNS[by]
+    only = {str(v) for v in only} if only else None
+
+    sinks = {}
+    def sink_for(group):
+        if group not in sinks:
+            sinks[group] = _SINKS[fmt](os.path.join(out_dir, f"OZ_Recommendations_{safe_name(group)}.{fmt}"), builder.columns)
+        return sinks[group]
+
+    if workers == 1 or len(chunks) <= 1:
+        results = map(builder.enrich, chunks)
+        pool = None
+    else:
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(builder,))
+        results = pool.map(_enrich_chunk, chunks)
+    try:
+        for enriched in results:
+            enriched = enriched[builder.columns]
+            groups = [('all', enriched)] if group_col is None else enriched.groupby(enriched[group_col].astype(object).fillna('Unknown').astype(str), sort=True)
+            for group, rows in groups:
+                if only is None or group in only: sink_for(group).write(rows)
+    finally:
+        if pool is not None: pool.shutdown()
+        for sink in sinks.values(): sink.close()
+    return {sink.path: sink.rows for sink in sinks.values()}
+
+
+def recommendation_backend(db=None, gsheets_worksheet=None):
+    """SQLite backend for ``db``, else the app's Google Sheets connection (needs Streamlit secrets)."""
+    if db: return SQLiteBackend(db)
+    def conn_factory():
+        import streamlit as st
+        from streamlit_gsheets import GSheetsConnection
+        return st.connection("gsheets", type=GSheetsConnection)
+    return GSheetsBackend(conn_factory, gsheets_worksheet or "Recommendations")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write recommendation reports for all users, parishes or regions.")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--db", default=os.environ.get("OZ_REC_DB"), help="SQLite recommendations database (default: $OZ_REC_DB)")
+    source.add_argument("--csv", help="exported Recommendations sheet")
+    parser.add_argument("--worksheet", default="Recommendations", help="Google Sheets worksheet when no --db/--csv is given")
+    parser.add_argument("--by", choices=sorted(GROUP_COLUMNS), default="parish")
+    parser.add_argument("--only", nargs="+", help="limit to these users/parishes/regions")
+    parser.add_argument("--format", choices=FORMATS, default="csv")
+    parser.add_argument("--nearest", type=int, default=DEFAULT_NEAREST, help="nearest anchors per tract")
+    parser.add_argument("--workers", type=int, help="process pool size (1 = no pool)")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--out-dir", default="reports")
+    args = parser.parse_args()
+
+    if args.csv: recs = pd.read_csv(args.csv, dtype={'Tract': str})
+    else: recs = pd.DataFrame(recommendation_backend(args.db, args.worksheet).read_all(), columns=REC_COLUMNS)
+    assets = load_assets(args.data_dir)
+    written = write_reports(recs, ReportBuilder.from_assets(assets, args.nearest), args.out_dir, args.by, args.format,
+                            args.workers, assets.hierarchy, args.only)
+    for path, n in written.items(): print(f"{path}\t{n}")
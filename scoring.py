@@ -0,0 +1,118 @@
+"""Vectorized tract scoring and cap-aware ranking over the whole tract table."""
+import numpy as np
+import pandas as pd
+
+# weight name: (tract table column, +1 if higher values mean more need, -1 if lower do)
+FACTORS = {
+    'poverty': ('poverty_pct', 1),
+    'mfi': ('mfi', -1),
+    'unemployment': ('unemployment_pct', 1),
+    'broadband': ('broadband_pct', -1),
+    'deep_distress': (None, 1),
+    'anchors': (None, 1),
+}
+DEFAULT_WEIGHTS = {'poverty': 1.0, 'mfi': 1.0, 'unemployment': 1.0, 'broadband': 0.5, 'deep_distress': 1.0, 'anchors': 0.5}
+DEFAULT_RADIUS_MI = 5.0
+RADIUS_OPTIONS_MI = (1, 2, 5, 10, 25)  # the ranking slider's choices; warm-up computes each one
+
+
+def minmax(values):
+    """Scale to [0, 1] over the finite entries; NaNs take the median, constant columns become 0."""
+    v = np.asarray(values, dtype=float)
+    finite = np.isfinite(v)
+    if not finite.any(): return np.zeros_like(v)
+    v = np.where(finite, v, np.median(v[finite]))
+    lo, hi = v.min(), v.max()
+    return np.zeros_like(v) if hi == lo else (v - lo) / (hi - lo)
+
+
+class ScoringEngine:
+    """Scores every tract in one pass and ranks the eligible ones.
+
+    Anchor counts within a radius come from ``AnchorIndex.count_within`` over
+    the tract centers the first time that radius is asked for and are
+    memoized per radius, so memory stays linear in tracts plus anchors
+    (a dense tract x anchor matrix would need ~34 GB at national scale).
+    """
+
+    def __init__(self, master, geometry_index, anchor_index, hierarchy, tract_anchors=None):
+        self.master = master
+        self.hierarchy = hierarchy
+        lookup = geometry_index.geoids.get_indexer(master['geoid_str'].astype(str))
+        lonlat = np.full((len(master), 2), np.nan)
+        lonlat[lookup >= 0] = geometry_index.centroid[lookup[lookup >= 0]]
+        self.lonlat = lonlat
+        self.anchor_index = anchor_index
+        self.eligible = (master['Eligibility_Status'] == 'Eligible').to_numpy()
+        self.deep_distress = (master['NMTC_Calculated'] == 'Deep Distress').to_numpy().astype(float)
+        self.parish = master['Parish'].astype(str).to_numpy()
+        self._columns = {name: master[col].to_numpy(dtype=float) for name, (col, _) in FACTORS.items() if col}
+        self._anchor_counts = {}
+        self.anchors_inside = tract_anchors.counts(master['geoid_str']) if tract_anchors is not None else np.zeros(len(master), dtype=np.int64)
+        for arr in (self.lonlat, self.eligible, self.deep_distress, self.parish, self.anchors_inside, *self._columns.values()): arr.flags.writeable = False
+
+    def anchor_counts(self, radius_mi=DEFAULT_RADIUS_MI):
+        radius_mi = float(radius_mi)
+        if radius_mi not in self._anchor_counts:
+            counts = self.anchor_index.count_within(self.lonlat[:, 1], self.lonlat[:, 0], radius_mi)
+            counts.flags.writeable = False
+            self._anchor_counts[radius_mi] = counts
+        return self._anchor_counts[radius_mi]
+
+    def components(self, positions, radius_mi=DEFAULT_RADIUS_MI):
+        """Normalized [0, 1] factor values (1 = most need / most anchors) for the given rows."""
+        comps = {}
+        for name, (col, direction) in FACTORS.items():
+            if name == 'deep_distress': raw = self.deep_distress[positions]
+            elif name == 'anchors': raw = self.anchor_counts(radius_mi)[positions].astype(float)
+            else: raw = self._columns[name][positions]
+            scaled = minmax(raw)
+            comps[name] = scaled if direction > 0 else 1.0 - scaled
+        return comps
+
+    def rank(self, weights=None, region=None, parish=None, top_k=None, radius_mi=DEFAULT_RADIUS_MI,
+             eligible_only=True, respect_cap=True, saved_by_parish=None):
+        """Ranked candidates as a DataFrame (best first).
+
+        With ``respect_cap`` each parish contributes at most its 25% allowance,
+        less the tracts already in ``saved_by_parish`` ({parish: set of GEOIDs}),
+        which are themselves excluded from the candidates.
+        """
+        weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+        positions = self.hierarchy.positions(region, parish)
+        if eligible_only: positions = positions[self.eligible[positions]]
+        saved_by_parish = saved_by_parish or {}
+        saved = set().union(*saved_by_parish.values()) if saved_by_parish else set()
+        if saved:
+            positions = positions[~np.isin(self.master['geoid_str'].to_numpy()[positions], list(saved))]
+        comps = self.components(positions, radius_mi)
+        total_weight = sum(abs(w) for w in weights.values()) or 1.0
+        score = sum(weights.get(name, 0.0) * comp for name, comp in comps.items()) / total_weight
+
+        order = np.argsort(-score, kind='stable')
+        positions, score = positions[order], score[order]
+        comps = {name: comp[order] for name, comp in comps.items()}
+        if respect_cap:
+            parishes = pd.Series(self.parish[positions])
+            seen = parishes.groupby(parishes, sort=False).cumcount().to_numpy()
+            caps = {p: self.hierarchy.max_selections(p) - len(saved_by_parish.get(p, ())) for p in parishes.unique()}
+            cap = parishes.map(caps).to_numpy()
+            keep = seen < cap
+            positions, score = positions[keep], score[keep]
+            comps = {name: comp[keep] for name, comp in comps.items()}
+        if top_k is not None:
+            positions, score = positions[:top_k], score[:top_k]
+            comps = {name: comp[:top_k] for name, comp in comps.items()}
+
+        rows = self.master.iloc[positions]
+        out = pd.DataFrame({
+            'rank': np.arange(1, len(positions) + 1),
+            'geoid': rows['geoid_str'].to_numpy(),
+            'Parish': rows['Parish'].to_numpy(),
+            'Region': rows['Region'].to_numpy(),
+            'score': np.round(score, 4),
+            'anchors_within': self.anchor_counts(radius_mi)[positions],
+            'anchors_inside': self.anchors_inside[positions],
+        })
+        for name, comp in comps.items(): out[f"{name}_score"] = np.round(comp, 3)
+        return out
@@ -0,0 +1,98 @@
+"""Prefix search over cities (from the crosswalk), parish names and tract GEOIDs."""
+import re
+from bisect import bisect_left
+from collections import namedtuple
+from itertools import islice
+
+import numpy as np
+
+from tract_table import parish_key
+
+SearchResult = namedtuple('SearchResult', ['kind', 'label', 'parishes', 'region', 'geoid'])
+KIND_ORDER = {'city': 0, 'parish': 1, 'tract': 2}
+
+
+def normalize_query(text):
+    """Lowercase, punctuation dropped, whitespace collapsed: 'St. Martinville ' -> 'st martinville'."""
+    s = re.sub(r"[^a-z0-9 ]", "", str(text).casefold().replace("-", " "))
+    return " ".join(s.split())
+
+
+def _aliases(key):
+    """The key plus spellings users type for it: 'st mary' -> 'saint mary', 'de soto' -> 'desoto'."""
+    keys = [key] + (["saint " + key[3:]] if key.startswith("st ") else [])
+    return keys + [k.replace(" ", "") for k in keys if " " in k]
+
+
+class SearchIndex:
+    """Two sorted key arrays searched with ``bisect``; built once per data load.
+
+    ``_names`` holds each entry's full normalized name (and GEOIDs), so a
+    query is a binary search plus a scan over the matching run. ``_words``
+    holds the later word starts of multi-word names ("orleans" for "New
+    Orleans") and is scanned only after the full-name matches. Crosswalk
+    parish spellings are matched to the tract table with ``parish_key``;
+    a city listed under two parishes ("Iberia Vermilion") maps to both.
+    """
+
+    def __init__(self, crosswalk, master):
+        parish_names = sorted(master['Parish'].dropna().astype(str).unique())
+        by_key = {parish_key(p): p for p in parish_names}
+        region_of = master.dropna(subset=['Parish', 'Region']).drop_duplicates('Parish').set_index('Parish')['Region'].astype(str).to_dict()
+
+        entries = []
+        cities = crosswalk[['City-Town', 'Parish']].dropna().astype(str).apply(lambda col: col.str.strip()).drop_duplicates()
+        for city, parish in cities.itertuples(index=False):
+            parishes = self._resolve_parishes(parish, by_key)
+            if not parishes: continue
+            entries.append(SearchResult('city', f"{city} ({', '.join(parishes)} Parish)", parishes, region_of.get(parishes[0]), None))
+        for p in parish_names:
+            entries.append(SearchResult('parish', f"{p} Parish", (p,), region_of.get(p), None))
+        for geoid, p in master[['geoid_str', 'Parish']].astype(str).itertuples(index=False):
+            entries.append(SearchResult('tract', f"Tract {geoid} ({p} Parish)", (p,), region_of.get(p), geoid))
+        self.entries = tuple(entries)
+        self._geoids = master['geoid_str'].astype(str).to_numpy()
+
+        names, words = [], []
+        for i, e in enumerate(entries):
+            key = e.geoid if e.kind == 'tract' else normalize_query(e.label.split(" (")[0])
+            for alias in _aliases(key):
+                names.append((alias, KIND_ORDER[e.kind], i))
+                parts = alias.split(" ")
+                words.extend((" ".join(parts[j:]), KIND_ORDER[e.kind], i) for j in range(1, len(parts)))
+        names.sort()
+        words.sort()
+        self._names, self._name_ids = [k for k, _, _ in names], np.array([i for _, _, i in names], dtype=np.int64)
+        self._words, self._word_ids = [k for k, _, _ in words], np.array([i for _, _, i in words], dtype=np.int64)
+        for arr in (self._geoids, self._name_ids, self._word_ids): arr.flags.writeable = False
+
+    @staticmethod
+    def _resolve_parishes(name, by_key):
+        key = parish_key(name)
+        if key in by_key: return (by_key[key],)
+        return tuple(p for k, p in sorted(by_key.items()) if k in key)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def search(self, query):
+        """Yield matching entries lazily: full-name prefix matches first, then word-start matches."""
+        q = normalize_query(query)
+        if not q: return
+        seen = set()
+        for keys, ids in ((self._names, self._name_ids), (self._words, self._word_ids)):
+            i = bisect_left(keys, q)
+            while i < len(keys) and keys[i].startswith(q):
+                entry_id = int(ids[i])
+                if entry_id not in seen:
+                    seen.add(entry_id)
+                    yield self.entries[entry_id]
+                i += 1
+
+    def complete(self, query, limit=10):
+        return list(islice(self.search(query), limit))
+
+    def candidate_tracts(self, result, hierarchy):
+        """GEOIDs a result points at: the tract itself, or every tract in its parish(es)."""
+        if result.geoid: return [result.geoid]
+        return [g for p in result.parishes for g in self._geoids[hierarchy.positions(None, p)]]
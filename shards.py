@@ -0,0 +1,253 @@
+"""Partitioned source data for multi-state deployments, loaded lazily.
+
+``python shards.py OUT_DIR SRC_DIR [SRC_DIR ...]`` joins and indexes the
+source files of one or more directories (each laid out like the repository
+root; a GeoJSON may hold several states) and writes a build:
+
+    manifest.json                                   current build, states and their counties
+    <build>/tracts/<state>.parquet                  joined tract table rows per state
+    <build>/geometry/index.npz                      bbox, centroid and vertex count per tract
+    <build>/geometry/<state>/<county>.<level>.json  lean features per county and level of detail
+    <build>/anchors.parquet                         anchors plus the GEOID of the tract they sit in
+    <build>/crosswalk.csv
+
+``load_assets`` reads such a directory instead of the raw files: the tract
+Parquet of the requested states is memory-mapped and county geometry stays
+on disk until a map asks for it. ``ShardedGeometryServer`` keeps only the
+most recently used county/level shards resident. Parish names found in more
+than one state are qualified with the state ("Washington (MS)") so parish
+filters and quotas stay unambiguous.
+"""
+import argparse
+import glob
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+import geometry
+import spatial
+import tract_table
+from geometry import DEFAULT_ZOOM, GeometryServer, TractGeometryIndex, resolve_id_key
+from spatial import locate_points
+from tract_table import files_sha256, parish_key, read_csv_with_fallback
+
+MANIFEST_FILE = "manifest.json"
+GEOJSON_PATTERN = "tl_*_tract.json"
+SHARD_CACHE_SIZE = 64
+STATE_ABBR = {
+    "01": "AL", "02": "AK", "04": "AZ", "05": "AR", "06": "CA", "08": "CO", "09": "CT", "10": "DE", "11": "DC",
+    "12": "FL", "13": "GA", "15": "HI", "16": "ID", "17": "IL", "18": "IN", "19": "IA", "20": "KS", "21": "KY",
+    "22": "LA", "23": "ME", "24": "MD", "25": "MA", "26": "MI", "27": "MN", "28": "MS", "29": "MO", "30": "MT",
+    "31": "NE", "32": "NV", "33": "NH", "34": "NJ", "35": "NM", "36": "NY", "37": "NC", "38": "ND", "39": "OH",
+    "40": "OK", "41": "OR", "42": "PA", "44": "RI", "45": "SC", "46": "SD", "47": "TN", "48": "TX", "49": "UT",
+    "50": "VT", "51": "VA", "53": "WA", "54": "WV", "55": "WI", "56": "WY", "72": "PR",
+}
+
+
+def county_of(geoid):
+    return str(geoid)[:5]
+
+
+def shard_path(geometry_dir, county, level):
+    return os.path.join(geometry_dir, county[:2], f"{county}.{level}.json")
+
+
+def is_partitioned(data_dir):
+    return os.path.exists(os.path.join(data_dir, MANIFEST_FILE))
+
+
+def read_manifest(data_dir):
+    with open(os.path.join(data_dir, MANIFEST_FILE)) as f: return json.load(f)
+
+
+class ShardedGeometryServer:
+    """``GeometryServer`` look-alike that reads county geometry shards on demand.
+
+    Only ``index`` is resident up front. ``feature_collection`` loads the
+    county shards covering the requested GEOIDs at the level for the zoom and
+    keeps the ``max_shards`` most recently used; a view wider than that
+    still renders, its extra shards are just not retained.
+    """
+
+    sharded = True
+    level_for_zoom = staticmethod(GeometryServer.level_for_zoom)
+
+    def __init__(self, geometry_dir, index, max_shards=SHARD_CACHE_SIZE):
+        self.geometry_dir = geometry_dir
+        self.index = index
+        self.id_key = index.id_key
+        self.featureidkey = f"properties.{self.id_key}"
+        self.max_shards = max_shards
+        self.loads = self.hits = 0
+        self._shards = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def resident(self):
+        return len(self._shards)
+
+    def shard(self, county, level):
+        """{GEOID: lean feature} for one county at one level of detail."""
+        key = (county, level)
+        with self._lock:
+            shard = self._shards.get(key)
+            if shard is not None:
+                self._shards.move_to_end(key)
+                self.hits += 1
+                return shard
+            self.loads += 1
+        with open(shard_path(self.geometry_dir, county, level)) as f:
+            shard = {str(feature['properties'].get(self.id_key)): feature for feature in json.load(f)}
+        with self._lock:
+            shard = self._shards.setdefault(key, shard)
+            while len(self._shards) > self.max_shards: self._shards.popitem(last=False)
+        return shard
+
+    def feature_collection(self, geoids, zoom=DEFAULT_ZOOM):
+        level, shards, features = self.level_for_zoom(zoom), {}, []
+        for geoid in self.index.geoids[self.index.positions(geoids)]:
+            county = county_of(geoid)
+            shard = shards.get(county)
+            if shard is None: shard = shards[county] = self.shard(county, level)
+            if geoid in shard: features.append(shard[geoid])
+        return {'type': 'FeatureCollection', 'features': features}
+
+
+# --- LOADING ---
+def _selected(manifest, states):
+    return [s for s in sorted(manifest['states']) if not states or s in states]
+
+
+def load_tracts(data_dir, manifest, states=None):
+    """Memory-mapped tract table rows of ``states`` (default: every state), indexed by GEOID."""
+    root = os.path.join(data_dir, manifest['build'], "tracts")
+    paths = [os.path.join(root, f"{s}.parquet") for s in _selected(manifest, states) if manifest['states'][s]['tracts']]
+    if not paths: raise ValueError(f"no tract shards for states {states} in {data_dir}")
+    table = pd.concat([pd.read_parquet(p, memory_map=True) for p in paths])
+    for col in tract_table.CATEGORICAL_COLUMNS:
+        if col in table: table[col] = table[col].astype(object).astype('category')  # drop other states' categories
+    return table
+
+
+def load_geometry_index(data_dir, manifest, states=None):
+    with np.load(os.path.join(data_dir, manifest['build'], "geometry", "index.npz")) as npz:
+        geoids, bbox, centroid, vertex_count = npz['geoids'], npz['bbox'], npz['centroid'], npz['vertex_count']
+    keep = np.isin(geoids.astype('U2'), _selected(manifest, states))
+    return TractGeometryIndex.from_arrays(geoids[keep], bbox[keep], centroid[keep], vertex_count[keep], manifest['id_key'])
+
+
+def load_anchor_shard(data_dir, manifest, states=None):
+    """Anchors of ``states`` and the GEOID of the tract each sits in ('' outside every tract)."""
+    anchors = pd.read_parquet(os.path.join(data_dir, manifest['build'], "anchors.parquet"))
+    tracts = anchors.pop('tract_geoid').fillna('').astype(str)
+    if states:
+        keep = tracts.str[:2].isin(_selected(manifest, states)).to_numpy()
+        anchors, tracts = anchors[keep].reset_index(drop=True), tracts[keep].reset_index(drop=True)
+    return anchors, tracts
+
+
+def load_crosswalk(data_dir, manifest):
+    return read_csv_with_fallback(os.path.join(data_dir, manifest['build'], "crosswalk.csv"))
+
+
+# --- BUILDING ---
+def qualify_parishes(table, crosswalk):
+    """Suffix parish names used by more than one state with the state, in both frames."""
+    state = table['geoid_str'].astype(str).str[:2]
+    parish = table['Parish'].astype(object)
+    states_per_parish = state.groupby(parish.to_numpy()).nunique()
+    shared = parish.isin(set(states_per_parish.index[states_per_parish > 1]))
+    if not shared.any(): return table, crosswalk
+    qualified = parish.where(~shared, parish + " (" + state.map(STATE_ABBR).fillna(state) + ")")
+    by_region = dict(zip(zip(parish[shared].map(parish_key), table['Region'][shared].astype(str)), qualified[shared]))
+    keys = zip(crosswalk['Parish'].map(parish_key), crosswalk['Region'].astype(str).str.strip())
+    crosswalk = crosswalk.assign(Parish=[by_region.get(k, p) for k, p in zip(keys, crosswalk['Parish'])])
+    return table.assign(Parish=qualified.astype('category')), crosswalk
+
+
+def build_shards(source_dirs, out_dir):
+    """Write a build for ``source_dirs`` under ``out_dir`` and point the manifest at it.
+
+    The build is named after the SHA-256 of the sources and of the modules
+    that shape its files, so an unchanged build is skipped and a code change
+    is never served stale shards. The previous build is kept for processes still serving
+    it; older ones are removed.
+    """
+    import data_store
+    from data_store import ANCHORS_FILE, load_anchors, load_geojson
+    geojson_paths = [p for d in source_dirs for p in sorted(glob.glob(os.path.join(d, GEOJSON_PATTERN)))]
+    if not geojson_paths: raise FileNotFoundError(f"no {GEOJSON_PATTERN} in {', '.join(source_dirs)}")
+    other_paths = [os.path.join(d, name) for d in source_dirs for name in (ANCHORS_FILE,) + tract_table.SOURCE_FILES]
+    code_paths = [os.path.abspath(m.__file__) for m in (sys.modules[__name__], tract_table, geometry, spatial, data_store)]
+    build = f"build-{files_sha256(geojson_paths + other_paths + code_paths)[:16]}"
+    previous = read_manifest(out_dir)['build'] if is_partitioned(out_dir) else None
+    if previous == build: return os.path.join(out_dir, MANIFEST_FILE)
+    root = os.path.join(out_dir, build)
+    geometry_dir = os.path.join(root, "geometry")
+    os.makedirs(os.path.join(root, "tracts"), exist_ok=True)
+
+    anchors = pd.concat([load_anchors(os.path.join(d, ANCHORS_FILE)) for d in source_dirs], ignore_index=True)
+    anchors = anchors.dropna(subset=['Lat', 'Lon']).reset_index(drop=True)
+    lon, lat = anchors['Lon'].to_numpy(dtype=float), anchors['Lat'].to_numpy(dtype=float)
+    order = np.argsort(lon, kind='stable')
+    tract_of_anchor = np.full(len(anchors), -1, dtype=np.int64)
+
+    # One county at a time, so only that county's simplified levels are ever in memory.
+    indexes, counties, id_key = [], {}, "GEOID"
+    for path in geojson_paths:
+        gj = load_geojson(path)
+        id_key = resolve_id_key(gj)
+        by_county = {}
+        for feature in gj['features']: by_county.setdefault(county_of(feature['properties'].get(id_key)), []).append(feature)
+        del gj
+        for county, features in sorted(by_county.items()):
+            server = GeometryServer({'type': 'FeatureCollection', 'features': features})
+            locate_points(lon, lat, server.index.bbox, server.levels[0], tract_of_anchor, sum(map(len, indexes)), order)
+            os.makedirs(os.path.join(geometry_dir, county[:2]), exist_ok=True)
+            for level, lean in enumerate(server.levels):
+                with open(shard_path(geometry_dir, county, level), "w") as f: json.dump(lean, f, separators=(",", ":"))
+            indexes.append(server.index)
+            counties.setdefault(county[:2], []).append(county)
+    geoids = np.concatenate([index.geoids.to_numpy(dtype=str) for index in indexes])
+    np.savez(os.path.join(geometry_dir, "index.npz"), geoids=geoids,
+             bbox=np.concatenate([i.bbox for i in indexes]), centroid=np.concatenate([i.centroid for i in indexes]),
+             vertex_count=np.concatenate([i.vertex_count for i in indexes]))
+    anchors['tract_geoid'] = np.where(tract_of_anchor >= 0, geoids[np.maximum(tract_of_anchor, 0)], None)
+    anchors.to_parquet(os.path.join(root, "anchors.parquet"))
+
+    table = pd.concat([tract_table.build_frame(d) for d in source_dirs])
+    crosswalks = [os.path.join(d, tract_table.CROSSWALK_FILE) for d in source_dirs]
+    crosswalk = pd.concat([read_csv_with_fallback(p) for p in crosswalks if os.path.exists(p)], ignore_index=True)
+    table, crosswalk = qualify_parishes(table[~table.index.duplicated()], crosswalk)
+    crosswalk.to_csv(os.path.join(root, "crosswalk.csv"), index=False)
+    states = {}
+    for code, rows in table.groupby(table['geoid_str'].astype(str).str[:2].to_numpy()):
+        rows.to_parquet(os.path.join(root, "tracts", f"{code}.parquet"))
+        states[code] = {'tracts': len(rows), 'counties': []}
+    for code, names in counties.items(): states.setdefault(code, {'tracts': 0})['counties'] = sorted(names)
+
+    manifest = {'build': build, 'id_key': id_key, 'built_at': round(time.time()),
+                'sources': [os.path.abspath(d) for d in source_dirs], 'states': dict(sorted(states.items()))}
+    tmp = os.path.join(out_dir, f"{MANIFEST_FILE}.{os.getpid()}.tmp")
+    with open(tmp, "w") as f: json.dump(manifest, f, indent=2)
+    os.replace(tmp, os.path.join(out_dir, MANIFEST_FILE))
+    for old in glob.glob(os.path.join(out_dir, "build-*")):
+        if os.path.basename(old) not in (build, previous): shutil.rmtree(old, ignore_errors=True)
+    return os.path.join(out_dir, MANIFEST_FILE)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Partition one or more states' source files into lazily loaded shards.")
+    parser.add_argument("out_dir")
+    parser.add_argument("source_dirs", nargs="+", help="directories laid out like the repository root")
+    args = parser.parse_args()
+    manifest_path = build_shards(args.source_dirs, args.out_dir)
+    states = read_manifest(args.out_dir)['states']
+    print(f"{sum(s['tracts'] for s in states.values())} tracts in {len(states)} states -> {manifest_path}")
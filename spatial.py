@@ -0,0 +1,235 @@
+"""Spatial lookups over the anchor/announcement points."""
+import numpy as np
+
+from geometry import polygons_of
+
+EARTH_RADIUS_MI = 3956
+MILES_PER_DEG_LAT = np.pi * EARTH_RADIUS_MI / 180
+MAX_DISTANCE_MI = np.pi * EARTH_RADIUS_MI  # half the circumference: every point on the sphere is this close
+_EMPTY_BUCKET = (np.empty(0, dtype=int), np.empty(0), np.empty((0, 3)))
+
+
+def haversine_miles(lon1, lat1, lon2, lat2):
+    """Great-circle distance in miles; accepts scalars or broadcastable arrays."""
+    lon1, lat1, lon2, lat2 = map(np.radians, (lon1, lat1, lon2, lat2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_MI * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def to_unit_xyz(lat, lon):
+    lat, lon = np.radians(np.asarray(lat, dtype=float)), np.radians(np.asarray(lon, dtype=float))
+    cos_lat = np.cos(lat)
+    return np.stack([cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)], axis=-1)
+
+
+class AnchorIndex:
+    """Latitude-sorted unit-sphere index answering k-nearest and radius queries.
+
+    Points are kept per ``Type`` bucket sorted by latitude, so a query only
+    computes distances for the latitude band that can contain a hit. Distances
+    are chord lengths on the unit sphere converted to great-circle miles, which
+    matches ``haversine_miles`` exactly.
+    """
+
+    def __init__(self, anchors):
+        self.anchors = anchors.dropna(subset=['Lat', 'Lon']).reset_index(drop=True)
+        lat = self.anchors['Lat'].to_numpy(dtype=float)
+        lon = self.anchors['Lon'].to_numpy(dtype=float)
+        types = self.anchors['Type'].astype(str).to_numpy()
+        self.types = sorted(np.unique(types).tolist())
+        self._buckets = {None: self._bucket(np.arange(len(lat)), lat, lon)}
+        for a_type in self.types:
+            rows = np.flatnonzero(types == a_type)
+            self._buckets[a_type] = self._bucket(rows, lat[rows], lon[rows])
+
+    @staticmethod
+    def _bucket(rows, lat, lon):
+        order = np.argsort(lat, kind='stable')
+        bucket = rows[order], lat[order], to_unit_xyz(lat[order], lon[order])
+        for arr in bucket: arr.flags.writeable = False
+        return bucket
+
+    def __len__(self):
+        return len(self.anchors)
+
+    def _band(self, lat, lon, radius_mi, a_type):
+        rows, lats, xyz = self._buckets.get(a_type, _EMPTY_BUCKET)
+        dlat = radius_mi / MILES_PER_DEG_LAT
+        lo, hi = np.searchsorted(lats, [lat - dlat, lat + dlat], side='left')
+        if hi <= lo: return rows[:0], np.empty(0)
+        chord = np.linalg.norm(xyz[lo:hi] - to_unit_xyz(lat, lon), axis=1)
+        return rows[lo:hi], 2 * EARTH_RADIUS_MI * np.arcsin(np.minimum(chord / 2, 1.0))
+
+    def within(self, lat, lon, radius_mi, a_type=None):
+        """Row positions and distances of anchors within ``radius_mi``, nearest first (none for NaN/inf points)."""
+        if not (np.isfinite(lat) and np.isfinite(lon)): return np.empty(0, dtype=int), np.empty(0)
+        rows, dist = self._band(lat, lon, radius_mi, a_type)
+        keep = dist <= radius_mi
+        rows, dist = rows[keep], dist[keep]
+        order = np.argsort(dist, kind='stable')
+        return rows[order], dist[order]
+
+    def nearest(self, lat, lon, k=15, a_type=None, start_radius_mi=25.0):
+        """Row positions and distances of the ``k`` nearest anchors, nearest first.
+
+        The search radius doubles until ``k`` hits are inside it (or it spans
+        the whole sphere); anything outside the radius is farther than every
+        hit, so the result is exact. NaN/inf points have no neighbours.
+        """
+        bucket_size = len(self._buckets.get(a_type, _EMPTY_BUCKET)[0])
+        k = min(k, bucket_size)
+        if k <= 0 or not (np.isfinite(lat) and np.isfinite(lon)): return np.empty(0, dtype=int), np.empty(0)
+        radius = start_radius_mi if start_radius_mi > 0 else 1.0
+        while True:
+            rows, dist = self._band(lat, lon, radius, a_type)
+            inside = np.flatnonzero(dist <= radius)
+            if len(inside) >= k or len(rows) == bucket_size or radius >= MAX_DISTANCE_MI: break
+            radius *= 2
+        if len(inside) < k: inside = np.arange(len(rows))
+        top = inside[np.argpartition(dist[inside], k - 1)[:k]] if len(inside) > k else inside
+        top = top[np.argsort(dist[top], kind='stable')]
+        return rows[top], dist[top]
+
+    def count_within(self, lat, lon, radius_mi, a_type=None, max_pairs=1 << 20):
+        """Number of anchors within ``radius_mi`` of each query point (0 for NaN/inf points).
+
+        Anchors are bucketed on a grid of latitude rows ``radius_mi`` tall,
+        each cut into cells at least ``radius_mi`` wide at that row's
+        latitudes, so a point only measures the anchors in its own and the
+        eight neighbouring cells. Point/anchor pairs are measured in
+        vectorized batches of at most ``max_pairs``.
+        """
+        rows, lats, xyz = self._buckets.get(a_type, _EMPTY_BUCKET)
+        lat, lon = np.asarray(lat, dtype=float), np.asarray(lon, dtype=float)
+        out = np.zeros(len(lat), dtype=np.int64)
+        ok = np.flatnonzero(np.isfinite(lat) & np.isfinite(lon))
+        if not len(rows) or not len(ok) or not radius_mi >= 0: return out
+        angle = min(radius_mi / EARTH_RADIUS_MI, np.pi)
+        max_chord = 2 * np.sin(angle / 2)
+        cell_lat = max(np.degrees(angle), 1e-9)
+
+        def columns(row):
+            # Any pair seen from ``row`` lies within rows row-1..row+1; cells must span the widest
+            # longitude gap between two points ``angle`` apart at the highest of those latitudes.
+            edge = np.minimum(np.maximum(np.abs((row - 1) * cell_lat - 90), np.abs((row + 2) * cell_lat - 90)), 90.0)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                reach = np.sin(angle) / np.cos(np.radians(edge))
+                width = np.degrees(np.arcsin(np.minimum(reach, 1.0)))
+                n = np.where((reach < 1) & (edge < 90), np.floor(360 / np.maximum(width, 1e-9)), 1)
+            return np.clip(n, 1, 1 << 20).astype(np.int64)
+
+        def cell_keys(row, lon_deg):
+            n = columns(row)
+            return row * (1 << 21) + np.floor((lon_deg + 180) / (360.0 / n)).astype(np.int64) % n, n
+
+        a_row = np.floor((lats + 90) / cell_lat).astype(np.int64)
+        a_key, _ = cell_keys(a_row, np.degrees(np.arctan2(xyz[:, 1], xyz[:, 0])))
+        order = np.argsort(a_key, kind='stable')
+        a_key, a_xyz = a_key[order], xyz[order]
+        q_row = np.floor((lat[ok] + 90) / cell_lat).astype(np.int64)
+        q_xyz = to_unit_xyz(lat[ok], lon[ok])
+        counts = np.zeros(len(ok), dtype=np.int64)
+        for d_row in (-1, 0, 1):
+            center, n_cols = cell_keys(q_row + d_row, lon[ok])
+            for d_col in (-1, 0, 1):
+                # rows with fewer than three cells would visit a cell twice
+                fresh = (n_cols > 2) | (d_col == 0) | ((n_cols == 2) & (d_col == 1))
+                keys = center - center % (1 << 21) + (center % (1 << 21) + d_col) % n_cols
+                lo, hi = np.searchsorted(a_key, keys, side='left'), np.searchsorted(a_key, keys, side='right')
+                hi = np.where(fresh, hi, lo)
+                ends = np.cumsum(hi - lo)
+                start = 0
+                while start < len(ok):
+                    stop = max(start + 1, int(np.searchsorted(ends, (ends[start - 1] if start else 0) + max_pairs, side='right')))
+                    n = hi[start:stop] - lo[start:stop]
+                    q = np.repeat(np.arange(start, stop), n)
+                    a = np.repeat(lo[start:stop] - np.concatenate(([0], np.cumsum(n)[:-1])), n) + np.arange(n.sum())
+                    hit = np.linalg.norm(a_xyz[a] - q_xyz[q], axis=1) <= max_chord
+                    counts += np.bincount(q[hit], minlength=len(ok))
+                    start = stop
+        out[ok] = counts
+        return out
+
+    def frame(self, rows, dist):
+        """Anchor rows for a query result with a ``dist`` column attached."""
+        return self.anchors.iloc[rows].assign(dist=dist)
+
+
+# --- POINT-IN-TRACT ASSIGNMENT ---
+def points_in_rings(px, py, rings):
+    """Even-odd ray cast of points against all rings of one feature (holes and parts included)."""
+    edges = [np.asarray(r, dtype=float)[:, :2] for r in rings if len(r) >= 3]
+    if not edges: return np.zeros(len(px), dtype=bool)
+    a = np.concatenate(edges)
+    b = np.concatenate([np.roll(e, -1, axis=0) for e in edges])
+    x1, y1, x2, y2 = a[:, 0], a[:, 1], b[:, 0], b[:, 1]
+    py_, px_ = py[:, None], px[:, None]
+    straddles = (y1 > py_) != (y2 > py_)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x_cross = x1 + (py_ - y1) * (x2 - x1) / (y2 - y1)
+    return ((straddles & (px_ < x_cross)).sum(axis=1) % 2) == 1
+
+
+def locate_points(lon, lat, bbox, features, out, offset=0, order=None):
+    """Set ``out[i] = offset + t`` for each still unassigned (-1) point inside feature ``t``.
+
+    ``order`` is ``argsort(lon)``; pass it when locating the same points
+    against several batches of features.
+    """
+    if order is None: order = np.argsort(lon, kind='stable')
+    lon_sorted = lon[order]
+    for t, (min_lon, min_lat, max_lon, max_lat) in enumerate(bbox):
+        if np.isnan(min_lon): continue
+        lo, hi = np.searchsorted(lon_sorted, min_lon, side='left'), np.searchsorted(lon_sorted, max_lon, side='right')
+        cand = order[lo:hi]
+        cand = cand[(lat[cand] >= min_lat) & (lat[cand] <= max_lat) & (out[cand] < 0)]
+        if not len(cand): continue
+        rings = [r for poly in polygons_of(features[t]['geometry']) for r in poly]
+        out[cand[points_in_rings(lon[cand], lat[cand], rings)]] = offset + t
+    return out
+
+
+class TractAnchorIndex:
+    """Which tract each anchor sits in, and the anchors inside each tract.
+
+    Built once: anchors are sorted by longitude so each tract only ray-casts
+    the points inside its bounding box. Results are kept CSR-style (anchor
+    rows grouped by tract) so lookups do no geometry work. A precomputed
+    ``tract_of_anchor`` (tract positions, -1 outside every tract) skips the
+    geometry entirely.
+    """
+
+    def __init__(self, anchors, geometry_index, features=None, tract_of_anchor=None):
+        self.anchors = anchors
+        self.geoids = geometry_index.geoids
+        if tract_of_anchor is None:
+            lat = anchors['Lat'].to_numpy(dtype=float)
+            lon = anchors['Lon'].to_numpy(dtype=float)
+            tract_of_anchor = locate_points(lon, lat, geometry_index.bbox, features, np.full(len(anchors), -1, dtype=np.int64))
+        self.tract_of_anchor = np.asarray(tract_of_anchor, dtype=np.int64)
+        assigned = np.flatnonzero(self.tract_of_anchor >= 0)
+        by_tract = assigned[np.argsort(self.tract_of_anchor[assigned], kind='stable')]
+        self._rows = by_tract
+        self._offsets = np.searchsorted(self.tract_of_anchor[by_tract], np.arange(len(self.geoids) + 1))
+        self.types = anchors['Type'].astype(str).to_numpy()
+        for arr in (self.tract_of_anchor, self._rows, self._offsets, self.types): arr.flags.writeable = False
+
+    def rows_in(self, geoid):
+        """Anchor row positions inside the tract (empty for unknown GEOIDs)."""
+        t = self.geoids.get_indexer([str(geoid)])[0]
+        if t < 0: return self._rows[:0]
+        return self._rows[self._offsets[t]:self._offsets[t + 1]]
+
+    def frame(self, geoid):
+        return self.anchors.iloc[self.rows_in(geoid)]
+
+    def counts(self, geoids=None):
+        """Anchors inside each tract, aligned with ``geoids`` (default: index order)."""
+        per_tract = np.diff(self._offsets)
+        if geoids is None: return per_tract
+        t = self.geoids.get_indexer([str(g) for g in geoids])
+        return np.where(t >= 0, per_tract[np.maximum(t, 0)], 0)
+
+    def counts_by_type(self, geoid):
+        types, n = np.unique(self.types[self.rows_in(geoid)], return_counts=True)
+        return dict(zip(types.tolist(), n.tolist()))
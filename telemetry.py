@@ -0,0 +1,132 @@
+"""Per-rerun timing spans and process-wide counters, logged as JSON lines.
+
+A rerun is traced with ``start_rerun``; ``lap`` closes the script section
+that just ran and ``span`` times a single call inside it. Every stage keeps
+its last ``window`` durations for the p50/p95 summary, and each finished
+rerun is logged as one JSON object on the ``telemetry.json`` logger.
+Counters are read from registered callables, so the objects that own them
+need no knowledge of this module.
+"""
+import json
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+log = logging.getLogger(__name__)
+json_log = logging.getLogger(f"{__name__}.json")
+
+
+class RerunTrace:
+    """Stage timings for one script run of one session."""
+
+    def __init__(self, telemetry, session=None, user=None):
+        self.telemetry = telemetry
+        self.session, self.user = session, user
+        self.started = self._last = self._active = time.perf_counter()
+        self.spans = {}
+        self.finished = False
+
+    def _add(self, stage, ms):
+        self._active = time.perf_counter()
+        self.spans[stage] = self.spans.get(stage, 0.0) + ms
+        self.telemetry._record(stage, ms)
+
+    def lap(self, stage):
+        """Attribute the time since the previous lap (or the start) to ``stage``."""
+        now = time.perf_counter()
+        self._add(stage, (now - self._last) * 1000)
+        self._last = now
+
+    def finish(self, interrupted=False):
+        """Record the rerun total and log it.
+
+        Reruns cut short by ``st.rerun``/``st.stop`` are finished by the
+        session's next ``start_rerun`` as interrupted, timed up to their last
+        recorded stage.
+        """
+        if self.finished: return
+        self.finished = True
+        total_ms = ((self._active if interrupted else time.perf_counter()) - self.started) * 1000
+        self.telemetry._record('rerun', total_ms)
+        self.telemetry._finished(self, {
+            'event': 'rerun', 'ts': round(time.time(), 3), 'session': self.session, 'user': self.user,
+            'total_ms': round(total_ms, 2), 'interrupted': interrupted,
+            'spans': {k: round(v, 2) for k, v in self.spans.items()}, 'counters': self.telemetry.counters(),
+        })
+
+
+class Telemetry:
+    """Process-wide stage timings (bounded windows) and counter sources."""
+
+    def __init__(self, window=2000, log_path=None):
+        self.window = window
+        self._stages = {}
+        self._sources = {}
+        self._open = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        if log_path and not any(getattr(h, 'baseFilename', None) == log_path for h in json_log.handlers):
+            handler = logging.FileHandler(log_path)
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            json_log.addHandler(handler)
+            json_log.setLevel(logging.INFO)
+
+    def start_rerun(self, session=None, user=None):
+        """Begin tracing a rerun, closing the session's previous one if it never reached ``finish``."""
+        trace = RerunTrace(self, session, user)
+        with self._lock:
+            previous = self._open.get(session)
+            self._open[session] = trace
+        if previous is not None: previous.finish(interrupted=True)
+        self._local.trace = trace
+        return trace
+
+    @property
+    def current(self):
+        trace = getattr(self._local, 'trace', None)
+        return None if trace is None or trace.finished else trace
+
+    @contextmanager
+    def span(self, stage):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            ms = (time.perf_counter() - started) * 1000
+            trace = self.current
+            if trace is not None: trace._add(stage, ms)
+            else: self._record(stage, ms)
+
+    def register(self, name, source):
+        """Expose ``source()`` (a number) as counter ``name``; re-registering replaces it."""
+        self._sources[name] = source
+
+    def counters(self):
+        values = {}
+        for name, source in list(self._sources.items()):
+            try: values[name] = source()
+            except Exception as e: log.debug("counter %s failed: %s", name, e)
+        return values
+
+    def _record(self, stage, ms):
+        with self._lock:
+            samples = self._stages.get(stage)
+            if samples is None: samples = self._stages[stage] = deque(maxlen=self.window)
+            samples.append(ms)
+
+    def _finished(self, trace, record):
+        with self._lock:
+            if self._open.get(trace.session) is trace: del self._open[trace.session]
+        json_log.info(json.dumps(record, default=str))
+
+    def summary(self):
+        """Calls, p50, p95 and max in ms per stage over the retained window, slowest p95 first."""
+        import numpy as np  # imported here so the login page does not pay for numpy/pandas
+        import pandas as pd
+        with self._lock:
+            stages = {name: np.fromiter(samples, dtype=float) for name, samples in self._stages.items()}
+        rows = [(name, len(v), np.percentile(v, 50), np.percentile(v, 95), v.max()) for name, v in stages.items() if len(v)]
+        out = pd.DataFrame(rows, columns=['stage', 'calls', 'p50_ms', 'p95_ms', 'max_ms']).round(2)
+        return out.sort_values('p95_ms', ascending=False, ignore_index=True)
@@ -0,0 +1,14 @@
+import os
+import sys
+
+import pytest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+
+@pytest.fixture(scope="session")
+def assets(tmp_path_factory):
+    """The shipped Louisiana data, with the tract table artifact built in a temporary cache."""
+    from data_store import load_assets
+    return load_assets(REPO_DIR, str(tmp_path_factory.mktemp("cache")))
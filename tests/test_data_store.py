@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+
+
+def shared_arrays(assets):
+    geometry, anchors, hierarchy, scoring = assets.geometry_index, assets.anchor_index, assets.hierarchy, assets.scoring
+    yield from (geometry.bbox, geometry.centroid, geometry.vertex_count)
+    for bucket in anchors._buckets.values(): yield from bucket
+    yield from (assets.tract_anchors.tract_of_anchor, assets.tract_anchors._rows, assets.tract_anchors._offsets)
+    yield from (hierarchy.positions(), hierarchy.positions(region=hierarchy.regions[0]), hierarchy.positions(parish='Acadia'))
+    yield from (scoring.lonlat, scoring.eligible, scoring.anchors_inside, scoring.anchor_counts(5))
+    yield assets.search._name_ids
+
+
+def test_shared_index_arrays_are_read_only(assets):
+    for arr in shared_arrays(assets):
+        assert not arr.flags.writeable
+        with pytest.raises(ValueError): arr[...] = 0
+
+
+def test_shared_mappings_are_read_only(assets):
+    geoid = assets.master['geoid_str'].iloc[0]
+    for mapping, key in ((assets.tract_centers, geoid), (assets.hierarchy.quotas, 'Acadia'), (assets.hierarchy.parish_of, geoid)):
+        with pytest.raises(TypeError): mapping[key] = None
+    with pytest.raises(AttributeError): assets.hierarchy.quotas['Acadia'].max_selections = 99
+    lon, lat = assets.tract_centers[geoid]
+    assert np.isfinite([lon, lat]).all()
+
+
+def test_a_copy_of_the_master_frame_leaves_the_shared_one_alone(assets):
+    session = assets.master.copy()
+    before = assets.master['Parish'].iloc[0]
+    session.loc[session.index[0], 'Parish'] = 'Acadia' if before != 'Acadia' else 'Allen'
+    assert assets.master['Parish'].iloc[0] == before
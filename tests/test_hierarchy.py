@@ -0,0 +1,25 @@
+import pandas as pd
+import pytest
+
+from hierarchy import TractHierarchy, quota_for
+
+
+@pytest.mark.parametrize("n_eligible, expected", [
+    (0, 0), (1, 0), (3, 0), (4, 1), (6, 1), (7, 1), (8, 2), (10, 2), (14, 3), (26, 6), (50, 12),
+])
+def test_quota_rounds_down_so_it_never_exceeds_a_quarter(n_eligible, expected):
+    assert quota_for(n_eligible) == expected
+    assert expected <= n_eligible * 0.25
+
+
+def test_parishes_with_few_eligible_tracts_get_no_allocation():
+    master = pd.DataFrame({
+        'geoid_str': [f"2201100{i:04d}" for i in range(6)],
+        'Region': ['Southwest'] * 6,
+        'Parish': ['Beauregard'] * 3 + ['Cameron'] * 3,
+        'Eligibility_Status': ['Eligible', 'Eligible', 'Ineligible', 'Ineligible', 'Ineligible', 'Ineligible'],
+    })
+    hierarchy = TractHierarchy(master)
+    assert hierarchy.max_selections('Beauregard') == 0
+    assert hierarchy.max_selections('Cameron') == 0
+    assert hierarchy.quotas['Beauregard'].eligible_tracts == 2
@@ -0,0 +1,26 @@
+from types import SimpleNamespace
+
+from map_figure import MapFigureCache, figure_cache_for, spans_states
+from warmup import warm_figure_cache
+
+
+def test_views_above_the_feature_cap_are_not_kept(assets):
+    cache = MapFigureCache(assets.geometry_server, assets.anchors, max_cached_features=100)
+    parish = assets.hierarchy.slice(assets.master, parish='Acadia')
+    for key, df in ((('All Louisiana', 'All in Region'), assets.master), (('Acadiana', 'Acadia'), parish)):
+        for _ in range(2):
+            with cache.figure(key, df, set()) as fig: assert len(fig.data[0].locations) == len(df)
+    assert (cache.hits, cache.misses) == (1, 3)
+
+
+def test_figure_cache_caps_only_sharded_servers(assets):
+    assert figure_cache_for(assets.geometry_server, assets.anchors).max_cached_features is None
+    sharded = SimpleNamespace(sharded=True)
+    assert figure_cache_for(sharded, assets.anchors).max_cached_features is not None
+    assert warm_figure_cache(SimpleNamespace(geometry_server=sharded), ('All Louisiana', 'All in Region')) is None
+
+
+def test_spans_states(assets):
+    assert not spans_states(assets.master)
+    two = assets.master.iloc[:2].assign(geoid_str=['22001960100', '28001950100'])
+    assert spans_states(two)
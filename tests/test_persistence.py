@@ -0,0 +1,128 @@
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from persistence import GSheetsBackend, RecommendationBackend, RecommendationCache, SQLiteBackend, WriteBehindQueue, _records
+
+
+def rec(user, tract, parish="Acadia"):
+    return {'username': user, 'Tract': tract, 'Parish': parish, 'Category': 'Housing Development', 'Justification': 'test',
+            'Population': 1000, 'Poverty': '26.3%', 'MFI': '$62,321', 'Broadband': '80.0%'}
+
+
+class FlakyBackend(SQLiteBackend):
+    def __init__(self, failures):
+        super().__init__()
+        self.failures = failures
+
+    def append(self, rows):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("sheet unavailable")
+        super().append(rows)
+
+
+class FakeWorksheet:
+    """The gspread worksheet calls ``GSheetsBackend.append`` makes, kept in memory."""
+
+    def __init__(self):
+        self.rows, self.input_options = [], set()
+
+    def row_values(self, i):
+        return list(self.rows[i - 1]) if len(self.rows) >= i else []
+
+    def append_row(self, values, value_input_option=None):
+        self.append_rows([values], value_input_option)
+
+    def append_rows(self, values, value_input_option=None):
+        self.input_options.add(value_input_option)
+        self.rows.extend(list(v) for v in values)
+
+
+@pytest.fixture
+def queue_factory():
+    queues = []
+    def make(backend, **kwargs):
+        queues.append(WriteBehindQueue(backend, flush_interval=3600, **kwargs))
+        return queues[-1]
+    yield make
+    for q in queues: q.close()
+
+
+def test_sqlite_backend_round_trip():
+    db = SQLiteBackend()
+    db.append([rec("ann", "22001960101"), rec("bob", "22001960102"), rec("ann", "01001020100")])
+    assert [r['Tract'] for r in db.read_user("ann")] == ["22001960101", "01001020100"]
+    assert db.row_count() == 3
+    assert db.read_user("ann")[0]['Poverty'] == "26.3%"
+
+
+def test_queued_rows_are_visible_before_flush(queue_factory):
+    db = SQLiteBackend()
+    writer = queue_factory(db)
+    writer.put(rec("ann", "22001960101"))
+    assert db.row_count() == 0
+    assert [r['Tract'] for r in writer.read_user("ann")] == ["22001960101"]
+    assert writer.read_user("bob") == []
+    assert writer.flush() == 1
+    assert writer.pending() == [] and writer.flushed == 1
+    assert [r['Tract'] for r in writer.read_user("ann")] == ["22001960101"]
+
+
+def test_flush_batches_rows(queue_factory):
+    db = SQLiteBackend()
+    writer = queue_factory(db, max_batch=2)
+    for i in range(5): writer.put(rec("ann", f"2200196010{i}"))
+    assert writer.flush() == 5
+    assert db.round_trips == 3
+    assert [r['Tract'] for r in db.read_user("ann")] == [f"2200196010{i}" for i in range(5)]
+
+
+def test_failed_batch_is_kept_and_retried_once(queue_factory):
+    db = FlakyBackend(failures=1)
+    writer = queue_factory(db)
+    writer.put(rec("ann", "22001960101"))
+    assert writer.flush() == 0
+    assert isinstance(writer.last_error, ConnectionError)
+    assert len(writer.pending("ann")) == 1
+    assert len(writer.read_user("ann")) == 1
+    assert writer.flush() == 1
+    assert writer.last_error is None
+    assert db.row_count() == 1 and writer.pending() == []
+
+
+def test_cache_indexes_appends_and_picks_up_outside_writes():
+    db = SQLiteBackend()
+    cache = RecommendationCache(db, check_interval=0.0)
+    cache.append([rec("ann", "22001960101")])
+    assert [r['Tract'] for r in cache.read_user("ann")] == ["22001960101"]
+    db.append([rec("ann", "22001960102")])
+    assert [r['Tract'] for r in cache.read_user("ann")] == ["22001960101", "22001960102"]
+    refreshes = cache.refreshes
+    cache.append([rec("bob", "22001960103")])
+    assert [r['Tract'] for r in cache.read_user("bob")] == ["22001960103"]
+    assert cache.refreshes == refreshes
+
+
+def test_gsheets_backend_appends_rows_as_built():
+    ws = FakeWorksheet()
+    conn = SimpleNamespace(client=SimpleNamespace(_select_worksheet=lambda worksheet=None: ws))
+    backend = GSheetsBackend(lambda: conn)
+    backend.append([rec("ann", "01001020100")])
+    assert ws.input_options == {"RAW"}
+    row = ws.rows[1]
+    assert row[:2] == ["ann", "01001020100"] and "26.3%" in row
+
+
+def test_records_restore_leading_zeros_of_numeric_tracts():
+    df = pd.DataFrame({'username': ["ann", "bob"], 'Tract': [1001020100, None]})
+    assert [r['Tract'] for r in _records(df)] == ["01001020100", None]
+
+
+def test_backend_missing_a_method_fails_on_creation():
+    class WriteOnly(RecommendationBackend):
+        def append(self, rows): pass
+
+    with pytest.raises(TypeError):
+        WriteOnly()
@@ -0,0 +1,43 @@
+import numpy as np
+
+
+def test_rank_respects_parish_caps(assets):
+    ranking = assets.scoring.rank()
+    per_parish = ranking['Parish'].value_counts()
+    for parish, n in per_parish.items():
+        assert n <= assets.hierarchy.max_selections(parish)
+    assert np.all(np.diff(ranking['score'].to_numpy()) <= 0)
+
+
+def test_rank_subtracts_and_excludes_saved_tracts(assets):
+    hierarchy = assets.hierarchy
+    parish = max(hierarchy.quotas, key=hierarchy.max_selections)
+    uncapped = assets.scoring.rank(parish=parish, respect_cap=False)
+    saved = {parish: set(uncapped['geoid'].head(2))}
+    ranking = assets.scoring.rank(parish=parish, saved_by_parish=saved)
+    assert len(ranking) == min(len(uncapped) - 2, hierarchy.max_selections(parish) - 2)
+    assert not set(ranking['geoid']) & saved[parish]
+
+
+def test_rank_drops_parishes_whose_cap_is_used_up(assets):
+    hierarchy = assets.hierarchy
+    parish = next(p for p, q in hierarchy.quotas.items() if q.max_selections == 1)
+    first = assets.scoring.rank(parish=parish)
+    assert len(first) == 1
+    assert assets.scoring.rank(parish=parish, saved_by_parish={parish: {first['geoid'].iloc[0]}}).empty
+
+
+def test_rank_without_cap_keeps_every_eligible_tract(assets):
+    n_eligible = sum(q.eligible_tracts for q in assets.hierarchy.quotas.values())
+    assert len(assets.scoring.rank(respect_cap=False)) == n_eligible
+
+
+def test_anchor_counts_match_brute_force(assets):
+    from spatial import haversine_miles
+    scoring = assets.scoring
+    lon, lat = scoring.lonlat[:, 0], scoring.lonlat[:, 1]
+    a_lat, a_lon = scoring.anchor_index.anchors['Lat'].to_numpy(), scoring.anchor_index.anchors['Lon'].to_numpy()
+    for radius in (1, 5, 25):
+        counts = scoring.anchor_counts(radius)
+        for t in np.random.default_rng(radius).choice(np.flatnonzero(np.isfinite(lat)), 50, replace=False):
+            assert counts[t] == np.count_nonzero(haversine_miles(lon[t], lat[t], a_lon, a_lat) <= radius)
@@ -0,0 +1,29 @@
+from search import normalize_query
+
+
+def test_normalize_query():
+    assert normalize_query("  St. Martin   Parish ") == normalize_query("st martin parish")
+
+
+def test_complete_matches_brute_force_prefixes(assets):
+    search = assets.search
+    for query in ("baton", "lafay", "st ", "new orl", "2207101"):
+        key = normalize_query(query)
+        hits = search.complete(query, limit=len(search))
+        labels = {e.label for e in hits}
+        for e in search.entries:
+            name = e.geoid if e.kind == 'tract' else normalize_query(e.label.split(" (")[0])
+            if name.startswith(key): assert e.label in labels, (query, e.label)
+
+
+def test_saint_alias_and_city_parishes(assets):
+    hits = assets.search.complete("saint martin", 20)
+    assert any(e.kind == 'parish' and e.parishes == ('St. Martin',) for e in hits)
+    baton_rouge = next(e for e in assets.search.complete("baton rouge", 20) if e.kind == 'city')
+    assert baton_rouge.parishes == ('East Baton Rouge',)
+
+
+def test_candidate_tracts_cover_the_parish(assets):
+    parish = next(e for e in assets.search.complete("acadia", 10) if e.kind == 'parish')
+    tracts = assets.search.candidate_tracts(parish, assets.hierarchy)
+    assert len(tracts) == assets.hierarchy.quotas['Acadia'].total_tracts
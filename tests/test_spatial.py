@@ -0,0 +1,119 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from geometry import polygons_of
+from spatial import MAX_DISTANCE_MI, AnchorIndex, TractAnchorIndex, haversine_miles, points_in_rings
+
+
+@pytest.fixture(scope="module")
+def anchors():
+    rng = np.random.default_rng(7)
+    n = 2000
+    return pd.DataFrame({
+        'Name': [f"a{i}" for i in range(n)],
+        'Lat': rng.uniform(29.0, 33.0, n), 'Lon': rng.uniform(-94.0, -89.0, n),
+        'Type': rng.choice(['Hospital', 'Port', 'University'], n),
+    })
+
+
+@pytest.fixture(scope="module")
+def queries():
+    rng = np.random.default_rng(11)
+    return list(zip(rng.uniform(28.5, 33.5, 25), rng.uniform(-94.5, -88.5, 25)))
+
+
+def brute_force(anchors, lat, lon, a_type=None):
+    rows = np.arange(len(anchors)) if a_type is None else np.flatnonzero(anchors['Type'].to_numpy() == a_type)
+    dist = haversine_miles(lon, lat, anchors['Lon'].to_numpy()[rows], anchors['Lat'].to_numpy()[rows])
+    return rows, dist
+
+
+@pytest.mark.parametrize("a_type", [None, "Port"])
+def test_nearest_matches_brute_force(anchors, queries, a_type):
+    index = AnchorIndex(anchors)
+    for lat, lon in queries:
+        rows, dist = index.nearest(lat, lon, k=15, a_type=a_type, start_radius_mi=5.0)
+        all_rows, all_dist = brute_force(anchors, lat, lon, a_type)
+        order = np.argsort(all_dist, kind='stable')[:15]
+        np.testing.assert_allclose(dist, all_dist[order], rtol=1e-9, atol=1e-9)
+        assert set(rows) == set(all_rows[order])
+
+
+def test_nearest_with_k_beyond_bucket_returns_whole_bucket(anchors):
+    index = AnchorIndex(anchors.head(10))
+    rows, dist = index.nearest(31.0, -91.0, k=50)
+    assert sorted(rows) == list(range(10)) and np.all(np.diff(dist) >= 0)
+
+
+@pytest.mark.parametrize("lat, lon", [(np.nan, -91.0), (31.0, np.inf), (-np.inf, np.nan)])
+def test_non_finite_points_have_no_neighbours(anchors, lat, lon):
+    index = AnchorIndex(anchors)
+    for rows, dist in (index.nearest(lat, lon, k=5), index.within(lat, lon, 50.0)):
+        assert len(rows) == 0 and len(dist) == 0
+
+
+def test_nearest_stops_expanding_at_the_far_side_of_the_sphere(anchors):
+    index = AnchorIndex(anchors)
+    rows, dist = index.nearest(-31.0, 89.0, k=3, start_radius_mi=0.0)  # antipode of the anchors
+    assert len(rows) == 3 and np.all(dist <= MAX_DISTANCE_MI)
+
+
+def test_within_matches_brute_force(anchors, queries):
+    index = AnchorIndex(anchors)
+    for radius in (5.0, 25.0, 120.0):
+        for lat, lon in queries:
+            all_rows, all_dist = brute_force(anchors, lat, lon)
+            rows, dist = index.within(lat, lon, radius)
+            assert np.array_equal(np.sort(rows), np.sort(all_rows[all_dist <= radius]))
+            assert np.all(np.diff(dist) >= 0)
+
+
+@pytest.mark.parametrize("radius", [0.0, 5.0, 25.0, 120.0, 5000.0])
+def test_count_within_matches_brute_force(anchors, queries, radius):
+    index = AnchorIndex(anchors)
+    lats, lons = np.array([q[0] for q in queries]), np.array([q[1] for q in queries])
+    expected = [np.count_nonzero(brute_force(anchors, lat, lon)[1] <= radius) for lat, lon in queries]
+    assert index.count_within(lats, lons, radius).tolist() == expected
+    assert index.count_within(lats, lons, radius, max_pairs=7).tolist() == expected
+
+
+def test_count_within_across_the_antimeridian_and_near_the_pole():
+    rng = np.random.default_rng(5)
+    lat, lon = rng.uniform(70, 89.9, 500), rng.normal(180, 0.3, 500) % 360 - 180
+    index = AnchorIndex(pd.DataFrame({'Lat': lat, 'Lon': lon, 'Type': 'Port'}))
+    q_lat, q_lon = rng.uniform(69, 90, 200), rng.uniform(-180, 180, 200)
+    for radius in (10.0, 60.0):
+        dist = haversine_miles(q_lon[:, None], q_lat[:, None], lon[None, :], lat[None, :])
+        assert index.count_within(q_lat, q_lon, radius).tolist() == (dist <= radius).sum(axis=1).tolist()
+
+
+def test_count_within_is_zero_for_missing_points(anchors):
+    assert AnchorIndex(anchors).count_within([np.nan, 31.0], [-91.0, np.inf], 50.0).tolist() == [0, 0]
+
+
+def test_points_in_rings_handles_holes_and_parts():
+    outer = [[0, 0], [4, 0], [4, 4], [0, 4], [0, 0]]
+    hole = [[1, 1], [3, 1], [3, 3], [1, 3], [1, 1]]
+    island = [[10, 10], [11, 10], [11, 11], [10, 11], [10, 10]]
+    px = np.array([0.5, 2.0, 3.5, 10.5, 5.0, -1.0])
+    py = np.array([0.5, 2.0, 3.5, 10.5, 5.0, 2.0])
+    assert points_in_rings(px, py, [outer, hole, island]).tolist() == [True, False, True, True, False, False]
+
+
+def test_points_in_rings_without_rings():
+    assert points_in_rings(np.array([0.0]), np.array([0.0]), []).tolist() == [False]
+
+
+def test_tract_assignment_matches_point_in_polygon(assets):
+    index, tract_anchors = assets.geometry_index, assets.tract_anchors
+    features = assets.geometry_server.levels[0]
+    anchors = tract_anchors.anchors
+    lon, lat = anchors['Lon'].to_numpy(dtype=float), anchors['Lat'].to_numpy(dtype=float)
+    for i in np.random.default_rng(3).choice(len(anchors), 100, replace=False):
+        t = tract_anchors.tract_of_anchor[i]
+        if t < 0: continue
+        rings = [r for poly in polygons_of(features[t]['geometry']) for r in poly]
+        assert points_in_rings(lon[i:i + 1], lat[i:i + 1], rings)[0]
+    precomputed = TractAnchorIndex(anchors, index, tract_of_anchor=tract_anchors.tract_of_anchor)
+    assert np.array_equal(precomputed.counts(), tract_anchors.counts())
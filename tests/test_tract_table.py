@@ -0,0 +1,26 @@
+import pandas as pd
+
+from tract_table import MASTER_FILE, build_frame
+
+
+def write_master(directory, rows):
+    columns = ['11-digit FIP', 'Parish', 'Region', 'Opportunity Zones Insiders Eligibilty', 'NMTC Eligible']
+    pd.DataFrame(rows, columns=columns).to_csv(directory / MASTER_FILE, index=False)
+
+
+def test_build_frame_keeps_the_first_row_of_a_duplicated_geoid(tmp_path):
+    write_master(tmp_path, [
+        [22001960100, 'Acadia', 'Acadiana', 'Eligible', 'Yes'],
+        ['22001960100.0', 'Allen', 'Southwest', 'Ineligible', 'No'],
+        [22003950100, 'Allen', 'Southwest', 'Ineligible', 'No'],
+    ])
+    table = build_frame(str(tmp_path))
+    assert table.index.tolist() == ['22001960100', '22003950100']
+    assert table.loc['22001960100', ['Parish', 'Region', 'Eligibility_Status', 'NMTC_Calculated']].tolist() == [
+        'Acadia', 'Acadiana', 'Eligible', 'Eligible']
+    assert table.loc['22003950100', 'Parish'] == 'Allen'
+
+
+def test_build_frame_pads_short_geoids(tmp_path):
+    write_master(tmp_path, [[1001020100, 'Autauga', 'Central', 'Eligible', 'No']])
+    assert build_frame(str(tmp_path))['geoid_str'].tolist() == ['01001020100']
@@ -0,0 +1,194 @@
+"""Typed, joined tract fact table built from every tract-level source file.
+
+The master file, the ACS demographics extract and the REDO tract file are
+joined once on the normalized 11-digit GEOID into one wide table with short
+canonical field names (``poverty_pct``, ``mfi``, ``broadband_pct`` ...).
+Where sources overlap the master file wins and the others only fill gaps;
+the city crosswalk fills in a missing Region from the parish. Display
+strings ("62,321", "26.3", "250,000+", "-") are parsed into float columns.
+
+The result is written as a Parquet artifact named after the SHA-256 of the
+source files and of this module, so changed sources or build logic always
+get a fresh artifact and unchanged ones are a single read. Build offline with ``python tract_table.py``;
+``load_tract_table`` builds on demand if the current artifact is missing.
+"""
+import argparse
+import glob
+import hashlib
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.path.join(DATA_DIR, ".cache")
+ARTIFACT_PREFIX = "tract_table-"
+
+MASTER_FILE = "Opportunity Zones 2.0 - Master Data File.csv"
+DEMOGRAPHICS_FILE = "Louisiana_All_Tracts_Demographics.csv"
+TRACT_DATA_FILE = "tract_data_final.csv"
+CROSSWALK_FILE = "city-parish-region-crosswalk.csv"
+SOURCE_FILES = (MASTER_FILE, DEMOGRAPHICS_FILE, TRACT_DATA_FILE, CROSSWALK_FILE)
+
+# canonical name: (master column, demographics column, tract data column), in precedence order
+NUMERIC_FIELDS = {
+    'population': ('Estimate!!Total!!Population for whom poverty status is determined', 'Total Population', 'pop_total'),
+    'under_18': ('Estimate!!Total!!Population for whom poverty status is determined!!AGE!!Under 18 years', None, None),
+    'poverty_pct': ('Estimate!!Percent below poverty level!!Population for whom poverty status is determined', 'Poverty Rate (%)', 'poverty_rate'),
+    'mfi': ('Estimate!!Median family income in the past 12 months (in 2024 inflation-adjusted dollars)', 'Median Family Income', None),
+    'median_hh_income': (None, None, 'med_hh_income'),
+    'metro_mfi': ('Geographic Area Name MFI', None, None),
+    'area_mfi': ('Area Median Family Income', None, None),
+    'state_mfi': ('State Median Family Income', None, None),
+    'median_home_value': ('Median Home Value', 'Median Home Value', None),
+    'disability_pct': ('Disability Population (%)', 'Disability Population (%)', None),
+    'medicaid_pct': (None, '% Medicaid/Public Insurance', None),
+    'labor_force_pct': ('Labor Force Participation (%)', 'Labor Force Participation (%)', None),
+    'unemployment_pct': ('Unemployment Rate (%)', 'Unemployment Rate (%)', 'unemp_rate'),
+    'hs_plus_pct': ('HS Degree or More (%)', 'HS Degree or More (%)', 'hs_plus_pct_25plus'),
+    'ba_plus_pct': ("Bachelor's Degree or More (%)", "Bachelor's Degree or More (%)", 'ba_plus_pct_25plus'),
+    'broadband_pct': ('Broadband Internet (%)', 'Broadband Internet (%)', None),
+    'pop_18_24': ('Population 18 to 24', None, None),
+    'pop_18_24_pct': (None, None, 'age_18_24_pct'),
+    'pop_65_plus': ('Population 65 years and over', None, None),
+    'redo_eligible': (None, None, 'Is_Eligible'),
+}
+TEXT_FIELDS = {
+    'name': ('Geographic Area Name', None, None),
+    'metro_status': ('Metro Status (Metropolitan/Rural)', None, None),
+    'metro_area': ('Geographic Classification', None, None),
+    'population_floor': ('Viable Tract Checkpoint: Minimum Population Floor', None, None),
+    'redo_region': (None, None, 'REDO_Region'),
+}
+CATEGORICAL_COLUMNS = ['Parish', 'Region', 'Eligibility_Status', 'NMTC_Calculated', 'metro_status', 'metro_area', 'redo_region']
+ELIGIBLE_VALUES = ['eligible', 'yes', '1', 'true']
+YES_VALUES = ['yes', 'true', '1']
+
+
+def read_csv_with_fallback(path):
+    for enc in ['utf-8', 'latin1', 'cp1252']:
+        try: return pd.read_csv(path, encoding=enc)
+        except: continue
+    return pd.read_csv(path)
+
+
+def files_sha256(paths):
+    h = hashlib.sha256()
+    for path in paths:
+        h.update(os.path.basename(path).encode())
+        if not os.path.exists(path): continue
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""): h.update(chunk)
+    return h.hexdigest()
+
+
+def normalize_geoid(series):
+    return series.astype(str).str.split('.').str[0].str.zfill(11)
+
+
+def parish_key(name):
+    """Spelling-insensitive parish key: 'De Soto Parish', 'DeSoto' -> 'desoto'."""
+    s = re.sub(r'\s+parish$', '', str(name).strip().lower())
+    return re.sub(r'[^a-z0-9]', '', s)
+
+
+def to_numeric(series):
+    """Vectorized version of the old per-cell safe_float: strips $ , % + and maps blanks/'-' to NaN."""
+    if pd.api.types.is_numeric_dtype(series): return series.astype('float64')
+    cleaned = series.astype('string').str.replace(r'[$,%+]', '', regex=True).str.strip()
+    return pd.to_numeric(cleaned, errors='coerce').astype('float64')
+
+
+def _flag(series, values):
+    return series.astype('string').str.strip().str.lower().isin(values).fillna(False).to_numpy(dtype=bool)
+
+
+def _canonical(raw, geoid_col, slot):
+    """Frame of the canonical fields one source provides, indexed by GEOID."""
+    out = pd.DataFrame(index=pd.Index(normalize_geoid(raw[geoid_col]), name='geoid'))
+    for name, cols in NUMERIC_FIELDS.items():
+        if cols[slot] and cols[slot] in raw: out[name] = to_numeric(raw[cols[slot]]).to_numpy()
+    for name, cols in TEXT_FIELDS.items():
+        if cols[slot] and cols[slot] in raw: out[name] = raw[cols[slot]].astype('string').str.strip().to_numpy()
+    return out[~out.index.duplicated()]
+
+
+def build_frame(data_dir=DATA_DIR):
+    """Join all tract sources into the wide canonical table (no caching)."""
+    path = lambda name: os.path.join(data_dir, name)
+    raw = read_csv_with_fallback(path(MASTER_FILE))
+    raw['11-digit FIP'] = normalize_geoid(raw['11-digit FIP'])
+    raw = raw.drop_duplicates(subset='11-digit FIP', ignore_index=True)  # first row wins, as in _canonical
+    table = _canonical(raw, '11-digit FIP', 0)
+    table.insert(0, 'geoid_str', table.index.to_numpy())
+    table['Parish'] = raw['Parish'].astype('string').str.strip().to_numpy()
+    table['Region'] = raw['Region'].astype('string').str.strip().to_numpy()
+    table['Eligibility_Status'] = np.where(_flag(raw['Opportunity Zones Insiders Eligibilty'], ELIGIBLE_VALUES), 'Eligible', 'Ineligible')
+    deep = _flag(raw['Deep Distress'], YES_VALUES) if 'Deep Distress' in raw else np.zeros(len(raw), bool)
+    nmtc = _flag(raw['NMTC Eligible'], YES_VALUES) if 'NMTC Eligible' in raw else np.zeros(len(raw), bool)
+    table['NMTC_Calculated'] = np.select([deep, nmtc], ["Deep Distress", "Eligible"], "Ineligible")
+    table['oz1_tract'] = _flag(raw['OZ 1.0 tract'], YES_VALUES) if 'OZ 1.0 tract' in raw else False
+
+    for name, geoid_col, slot in ((DEMOGRAPHICS_FILE, 'FIPS', 1), (TRACT_DATA_FILE, 'GEOID', 2)):
+        if not os.path.exists(path(name)): continue
+        extra = _canonical(read_csv_with_fallback(path(name)), geoid_col, slot).reindex(table.index)
+        for col in extra.columns:
+            table[col] = table[col].fillna(extra[col]) if col in table else extra[col]
+
+    if os.path.exists(path(CROSSWALK_FILE)):
+        crosswalk = read_csv_with_fallback(path(CROSSWALK_FILE)).dropna(subset=['Parish', 'Region'])
+        region_by_parish = dict(zip(crosswalk['Parish'].map(parish_key), crosswalk['Region'].str.strip()))
+        table['Region'] = table['Region'].fillna(table['Parish'].map(parish_key).map(region_by_parish))
+
+    for col in CATEGORICAL_COLUMNS:
+        if col in table: table[col] = table[col].astype('category')
+    return table
+
+
+def artifact_path(source_hash, cache_dir=CACHE_DIR):
+    return os.path.join(cache_dir, f"{ARTIFACT_PREFIX}{source_hash[:16]}.parquet")
+
+
+def source_paths(data_dir=DATA_DIR):
+    return [os.path.join(data_dir, name) for name in SOURCE_FILES]
+
+
+def build_key(data_dir=DATA_DIR):
+    """SHA-256 of the sources plus this module, so editing the field maps or ``build_frame`` rebuilds."""
+    return files_sha256(source_paths(data_dir) + [os.path.abspath(__file__)])
+
+
+def build_tract_table(data_dir=DATA_DIR, cache_dir=CACHE_DIR):
+    """Write the Parquet artifact for the current sources and drop artifacts of older ones."""
+    path = artifact_path(build_key(data_dir), cache_dir)
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    build_frame(data_dir).to_parquet(tmp)
+    os.replace(tmp, path)
+    for old in glob.glob(os.path.join(cache_dir, f"{ARTIFACT_PREFIX}*.parquet")):
+        if old != path:
+            try: os.remove(old)
+            except OSError: pass
+    return path
+
+
+def load_tract_table(data_dir=DATA_DIR, cache_dir=CACHE_DIR):
+    """Memory-mapped read of the artifact for the current sources, building it if missing.
+
+    The returned frame is indexed by 11-digit GEOID, so a tract's row is a
+    single ``.loc`` lookup.
+    """
+    path = artifact_path(build_key(data_dir), cache_dir)
+    if not os.path.exists(path):
+        try: path = build_tract_table(data_dir, cache_dir)
+        except OSError: return build_frame(data_dir)  # read-only deploy dir
+    return pd.read_parquet(path, memory_map=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the joined tract table artifact from the source CSVs.")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    args = parser.parse_args()
+    print(build_tract_table(args.data_dir, args.cache_dir))
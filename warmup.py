@@ -0,0 +1,85 @@
+"""Background warm-up: heavy imports, asset loading and the first map figure.
+
+``Preloader`` runs named tasks in order on one daemon thread, started by the
+first script run of a server process (the login page), so the first
+signed-in rerun finds modules imported and data indexed. ``result`` waits
+for a task and returns its value or re-raises its error.
+"""
+import importlib
+import logging
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+HEAVY_MODULES = ("numpy", "pandas", "plotly.graph_objects", "plotly.express", "streamlit_gsheets", "data_store", "map_figure", "persistence")
+
+
+def import_modules(names=HEAVY_MODULES):
+    for name in names: importlib.import_module(name)
+    return len(names)
+
+
+def load_data_store():
+    from data_store import DataStore
+    from scoring import RADIUS_OPTIONS_MI
+    store = DataStore()
+    scoring = store.get().scoring
+    for radius_mi in RADIUS_OPTIONS_MI: scoring.anchor_counts(radius_mi)
+    return store
+
+
+def warm_figure_cache(assets, key):
+    """A ``MapFigureCache`` holding the base figure for ``key`` over the whole tract table.
+
+    Returns None for a sharded build: its whole-table figure would load every
+    county shard, and the app only draws it once a region narrows the view.
+    """
+    from map_figure import figure_cache_for
+    if assets.geometry_server.sharded: return None
+    cache = figure_cache_for(assets.geometry_server, assets.anchors)
+    with cache.figure(key, assets.master, set()): pass
+    return cache
+
+
+class Preloader:
+    def __init__(self):
+        self.timings = {}
+        self._tasks = []
+        self._done, self._results, self._errors = {}, {}, {}
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def add(self, name, fn):
+        self._tasks.append((name, fn))
+        self._done[name] = threading.Event()
+        return self
+
+    def start(self):
+        """Start the warm-up thread (idempotent)."""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="warm-up", daemon=True)
+                self._thread.start()
+        return self
+
+    def _run(self):
+        for name, fn in self._tasks:
+            started = time.perf_counter()
+            try:
+                self._results[name] = fn()
+            except Exception as e:
+                self._errors[name] = e
+                log.warning("Warm-up step %s failed: %s", name, e)
+            finally:
+                self.timings[name] = time.perf_counter() - started
+                self._done[name].set()
+        log.info("Warm-up finished: %s", {k: round(v, 2) for k, v in self.timings.items()})
+
+    def ready(self, name):
+        return self._done[name].is_set()
+
+    def result(self, name, timeout=None):
+        if not self._done[name].wait(timeout): raise TimeoutError(f"warm-up step {name} still running")
+        if name in self._errors: raise self._errors[name]
+        return self._results[name]